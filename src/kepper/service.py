@@ -27,6 +27,7 @@ from hypurrquant.utils.graceful_shutdown import GracefulShutdownMixin
 from ..constants import Chain
 from web3.exceptions import ContractLogicError
 from dataclasses import dataclass
+from utils.rpc_pool import use_rpc_pool
 
 from .abi import *
 
@@ -88,6 +89,7 @@ class HedgeOnKeeper(GracefulShutdownMixin):
 
     async def run_once(self):
         async with use_chain(Chain.HYPERLIQUID) as web3ctx:
+            use_rpc_pool(await web3ctx.get_w3())
             # 1) Vault가 보유 중인 모든 NFT 수집
             nft_tokens_map = await fetch_vault_held_nft_ids(web3ctx, NFT_VAULT_ADDRESS)
 
@@ -1,10 +1,6 @@
 from contextlib import asynccontextmanager
 from hypurrquant.db import init_db, close_db
-from hypurrquant.logging_config import (
-    configure_logging,
-    coroutine_logging,
-    set_coroutine_id,
-)
+from hypurrquant.logging_config import configure_logging
 from hypurrquant.server.exception_handler import (
     base_order_exception_handler,
     hypuerliquid_client_error_handler,
@@ -18,8 +14,12 @@ from hypurrquant.messaging.dependencies import get_producer
 from hypurrquant.evm.utils.rpc import use_chain
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi import FastAPI
 from router.router import router
+from middleware import RequestContextMiddleware, metrics_endpoint
+from services import PoolSnapshotService, PoolUpdateBroadcaster, Service
+from services.tokens import TokenRegistry
 from fastapi.exceptions import RequestValidationError
 
 from hyperliquid.utils.error import ServerError, ClientError
@@ -45,9 +45,25 @@ async def lifespan(app: FastAPI):
         # 2. producer 시작
         producer = get_producer()
         await producer.start()
+
+        # 3. pool-infos 필터/정렬용 인덱스 보장
+        service = Service()
+        await service.tvl_service.ensure_indexes()
+        await service.pool_info_service.ensure_indexes()
+        await TokenRegistry().ensure_indexes()
+
+        # 4. pool-infos 스냅샷 백그라운드 갱신 시작
+        snapshot = PoolSnapshotService()
+        snapshot.start()
+
+        # 5. 인덱서 변경 알림 구독 (SSE push)
+        broadcaster = PoolUpdateBroadcaster()
+        broadcaster.start()
         try:
             yield
         finally:
+            await broadcaster.stop()
+            await snapshot.stop()
             await producer.stop()
             await close_db()  # 안전 종료 (항상 호출)
     except Exception as e:
@@ -90,37 +106,15 @@ def create_app() -> FastAPI:
     executor = ThreadPoolExecutor(max_workers=DEFAULT_THREAD_WORKERS)
     loop.set_default_executor(executor)
 
-    @app.middleware("http")
-    @coroutine_logging
-    async def logging_middleware(request, call_next):
-        """
-        요청 로그 미들웨어
-        """
-        _logger.info(f"Request: {request.method} {request.url}")
-
-        # 시간 체크
-        start = asyncio.get_running_loop().time()
-        response = await call_next(request)
-        end = asyncio.get_running_loop().time()
-        duration = end - start
-        # 응답 로그
-        _logger.info(f"Response: {response.status_code}")
-        _logger.debug(f"Duration: {duration:.2f} seconds")
-
-        return response
-
-    @app.middleware("http")
-    async def set_coroutine_id_middleware(request: Request, call_next):
-        # 1) 헤더에서 ID 가져오기
-        cid = request.headers.get("X-Coroutine-ID")
-        if cid:
-            _logger.debug(f"Set Coroutine ID: {cid}")
-            set_coroutine_id(cid, force=True)
-
-        # 2) 다음 미들웨어 / 라우터 처리
-        response = await call_next(request)
-
-        return response
+    # coroutine id 설정 + route 별 지연/상태코드 메트릭 (순수 ASGI, 가장 바깥에서 측정)
+    app.add_middleware(RequestContextMiddleware)
+    app.add_api_route(
+        "/metrics",
+        metrics_endpoint,
+        methods=["GET"],
+        response_class=PlainTextResponse,
+        include_in_schema=False,
+    )
 
     return app
 
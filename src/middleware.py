@@ -0,0 +1,88 @@
+from hypurrquant.logging_config import (
+    configure_logging,
+    coroutine_logging,
+    set_coroutine_id,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.responses import PlainTextResponse
+from utils.metrics import REGISTRY
+import time
+
+_logger = configure_logging(__name__)
+
+COROUTINE_ID_HEADER = b"x-coroutine-id"
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+RESPONSES = REGISTRY.counter(
+    "http_responses_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+)
+
+
+def _route_template(scope: Scope) -> str:
+    # 라우터가 매칭 후 scope 에 채워 넣는 route 를 사용 (경로 파라미터로 라벨이 폭증하지 않도록)
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class RequestContextMiddleware:
+    """
+    BaseHTTPMiddleware 대신 쓰는 순수 ASGI 미들웨어.
+    - X-Coroutine-ID 헤더가 있으면 로깅용 coroutine id 로 설정
+    - route 템플릿별 지연 히스토그램 / 상태코드 카운터 / in-flight gauge 기록
+    요청/응답 본문을 감싸지 않으므로 스트리밍 응답도 그대로 통과한다.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for key, value in scope["headers"]:
+            if key == COROUTINE_ID_HEADER:
+                set_coroutine_id(value.decode("latin-1"), force=True)
+                break
+
+        await self._handle(scope, receive, send)
+
+    @coroutine_logging
+    async def _handle(self, scope: Scope, receive: Receive, send: Send):
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            duration = time.perf_counter() - start
+            method = scope["method"]
+            route = _route_template(scope)
+            REQUEST_LATENCY.observe(method, route, value=duration)
+            RESPONSES.inc(method, route, str(status))
+            _logger.debug(f"{method} {route} {status} {duration:.3f}s")
+
+
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -6,10 +6,23 @@ from constants import (
     Chain,
     get_address_by_ticker,
 )
-from services import Service, get_service
+from utils.singleflight import singleflight_stats
+from services.index.tvl import PoolQuery
+from services import (
+    Service,
+    PoolSnapshotService,
+    PoolUpdateBroadcaster,
+    get_service,
+    get_snapshot_service,
+    get_broadcaster,
+)
 
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 
 router = APIRouter()
 
@@ -18,7 +31,139 @@ _logger = configure_logging(__name__)
 
 
 @router.get("/pool-infos", summary="ticker -> address로 변환")
-async def ticker_to_address(service: Service = Depends(get_service)):
+async def ticker_to_address(
+    dex_type: Optional[str] = Query(None, description="ex) hybra"),
+    token: Optional[str] = Query(None, description="token0 또는 token1 주소"),
+    min_tvl_usd: Optional[float] = Query(None, ge=0),
+    min_apr: Optional[float] = Query(None, ge=0),
+    sort: Optional[Literal["apr", "tvl_usd", "total_fee_usd", "pool_address"]] = None,
+    order: Optional[Literal["asc", "desc"]] = Query(None, description="기본 desc"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor"),
+    service: Service = Depends(get_service),
+    snapshot: PoolSnapshotService = Depends(get_snapshot_service),
+):
+    params = (dex_type, token, min_tvl_usd, min_apr, sort, order, limit, cursor)
+    if all(p is None for p in params):
+        # 백그라운드로 갱신되는 스냅샷을 그대로 내려준다 (stale-while-revalidate)
+        response = await snapshot.get()
+        return success_response(response)
+
+    # 필터/정렬/페이지네이션은 Mongo 쿼리로 내려서 해당 페이지만 조립
+    query = PoolQuery(
+        dex_type=dex_type,
+        token_address=token,
+        min_tvl_usd=min_tvl_usd,
+        min_apr=min_apr,
+        sort=sort or "apr",
+        descending=order != "asc",
+        limit=limit or 100,
+        cursor=cursor,
+    )
+    try:
+        response, next_cursor = await service.query_pools(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = success_response(response)
+    if next_cursor:
+        result.headers["X-Next-Cursor"] = next_cursor
+    return result
+
+
+MAX_BATCH_ADDRESSES = 100
+SSE_HEARTBEAT_SEC = 15
+
+
+@router.get("/pool-infos/subscribe", summary="풀 변경분 SSE 구독")
+async def subscribe_pool_infos(
+    dex_type: Optional[str] = Query(None, description="ex) hybra"),
+    token: Optional[str] = Query(None, description="token0 또는 token1 주소"),
+    initial: bool = Query(True, description="연결 직후 현재 상태를 먼저 전송"),
+    broadcaster: PoolUpdateBroadcaster = Depends(get_broadcaster),
+):
+    """
+    Server-Sent Events 로 풀 단위 변경분을 push 한다.
+    - event: pool          -> 변경(또는 신규)된 풀의 InfoResponse
+    - event: pool_removed  -> {"pool_address": ...}
+    """
+    sub = broadcaster.subscribe(dex_type=dex_type, token_address=token)
+
+    def sse(event: str, payload) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    async def body():
+        try:
+            if initial:
+                for info in broadcaster.current(sub):
+                    yield sse("pool", info)
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(
+                        sub.queue.get(), timeout=SSE_HEARTBEAT_SEC
+                    )
+                except asyncio.TimeoutError:
+                    # 프록시/로드밸런서 idle timeout 방지용 주석 라인
+                    yield ": ping\n\n"
+                    continue
+                yield sse(event, payload)
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    response = await service.get_all_pools()
+
+@router.get("/pool-infos/stream", summary="풀 정보 NDJSON 스트리밍")
+async def stream_pool_infos(
+    batch_size: int = Query(200, ge=1, le=1000),
+    service: Service = Depends(get_service),
+):
+    """
+    한 줄에 풀 하나(InfoResponse)씩 application/x-ndjson 으로 내려준다.
+    전체 조립을 기다리지 않고 tvl 커서를 읽는 대로 전송된다.
+    """
+
+    async def body():
+        async for info in service.stream_pools(batch_size):
+            yield json.dumps(jsonable_encoder(info)) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.get("/pool-infos/batch", summary="여러 풀 주소 단건 조회")
+async def get_pool_infos_batch(
+    addresses: List[str] = Query(..., description="풀 주소 목록 (반복 파라미터)"),
+    service: Service = Depends(get_service),
+):
+    if len(addresses) > MAX_BATCH_ADDRESSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many addresses: {len(addresses)} > {MAX_BATCH_ADDRESSES}",
+        )
+    try:
+        response = await service.get_pools(addresses)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await service.record_pool_reads(r.tvl_response.pool_address for r in response)
     return success_response(response)
+
+
+@router.get("/pool-infos/{pool_address}", summary="풀 주소 단건 조회")
+async def get_pool_info(pool_address: str, service: Service = Depends(get_service)):
+    try:
+        response = await service.get_pools([pool_address])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not response:
+        raise HTTPException(status_code=404, detail=f"Pool not found: {pool_address}")
+    await service.record_pool_reads([response[0].tvl_response.pool_address])
+    return success_response(response[0])
+
+
+@router.get("/singleflight-stats", summary="single-flight 합류(coalesce) 통계")
+async def get_singleflight_stats():
+    return success_response(singleflight_stats())
@@ -1,5 +1,15 @@
 from .service import Service
+from .snapshot import PoolSnapshotService
+from .live import PoolUpdateBroadcaster
 
 
 def get_service() -> Service:
     return Service()
+
+
+def get_snapshot_service() -> PoolSnapshotService:
+    return PoolSnapshotService()
+
+
+def get_broadcaster() -> PoolUpdateBroadcaster:
+    return PoolUpdateBroadcaster()
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Set
+
+import numpy as np
+
+from .index.tvl import TvlResponse
+
+HOURS_PER_YEAR = 24 * 365
+
+
+@dataclass
+class PoolColumns:
+    """
+    풀 단위 값을 컬럼(NumPy 배열)으로 모아둔 형태.
+    토큰은 tokens 리스트의 인덱스(token id)로 참조한다.
+    """
+
+    tokens: List[str]
+    t0_idx: np.ndarray
+    t1_idx: np.ndarray
+    t0_balance: np.ndarray
+    t1_balance: np.ndarray
+    t0_fees: np.ndarray
+    t1_fees: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.t0_idx)
+
+
+@dataclass
+class PoolMetrics:
+    t0_price: np.ndarray
+    t1_price: np.ndarray
+    tvl_usd: np.ndarray
+    total_fee_usd: np.ndarray
+    apr: np.ndarray
+    price_stale: np.ndarray
+
+
+def build_columns(rows: List[TvlResponse]) -> PoolColumns:
+    token_ids: Dict[str, int] = {}
+    t0_idx = np.empty(len(rows), dtype=np.int64)
+    t1_idx = np.empty(len(rows), dtype=np.int64)
+    for i, r in enumerate(rows):
+        t0_idx[i] = token_ids.setdefault(r.t0_addr, len(token_ids))
+        t1_idx[i] = token_ids.setdefault(r.t1_addr, len(token_ids))
+
+    return PoolColumns(
+        tokens=list(token_ids),
+        t0_idx=t0_idx,
+        t1_idx=t1_idx,
+        t0_balance=np.fromiter((r.t0_balance for r in rows), np.float64, len(rows)),
+        t1_balance=np.fromiter((r.t1_balance for r in rows), np.float64, len(rows)),
+        t0_fees=np.fromiter((r.t0_fees for r in rows), np.float64, len(rows)),
+        t1_fees=np.fromiter((r.t1_fees for r in rows), np.float64, len(rows)),
+    )
+
+
+def price_vector(tokens: List[str], token_price_map: Mapping[str, Mapping]) -> np.ndarray:
+    # 가격이 없는(None) 토큰은 기존과 동일하게 0 으로 계산
+    return np.fromiter(
+        ((token_price_map.get(t) or {}).get("price_usd") or 0 for t in tokens),
+        np.float64,
+        len(tokens),
+    )
+
+
+def compute_metrics(
+    cols: PoolColumns,
+    token_price_map: Mapping[str, Mapping],
+    stale_tokens: Set[str] = frozenset(),
+) -> PoolMetrics:
+    """
+    TVL/수수료/APR 을 전체 풀에 대해 한 번에 계산.
+    apr = 1h 수수료(USD) / TVL(USD) * 24 * 365 (TVL 이 0 이면 0)
+    """
+    prices = price_vector(cols.tokens, token_price_map)
+    stale = np.fromiter((t in stale_tokens for t in cols.tokens), bool, len(cols.tokens))
+
+    t0_price = prices[cols.t0_idx]
+    t1_price = prices[cols.t1_idx]
+    total_fee_usd = cols.t0_fees * t0_price + cols.t1_fees * t1_price
+    tvl_usd = cols.t0_balance * t0_price + cols.t1_balance * t1_price
+
+    apr = np.zeros(len(cols), dtype=np.float64)
+    np.divide(total_fee_usd, tvl_usd, out=apr, where=tvl_usd > 0)
+    apr *= HOURS_PER_YEAR
+
+    return PoolMetrics(
+        t0_price=t0_price,
+        t1_price=t1_price,
+        tvl_usd=tvl_usd,
+        total_fee_usd=total_fee_usd,
+        apr=apr,
+        price_stale=stale[cols.t0_idx] | stale[cols.t1_idx],
+    )
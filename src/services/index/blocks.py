@@ -0,0 +1,148 @@
+from typing import Dict, Optional, Tuple
+from web3 import AsyncWeb3
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+
+logger = configure_logging(__name__)
+
+# 브래킷을 찾을 때 처음 추정치에서 벗어나면 이 배수씩 범위를 넓힌다
+BRACKET_GROWTH = 2
+# 찾은 블록보다 이만큼 이전의 쌍은 프로세스 내 dict 에서 버린다 (Mongo 에는 남음).
+# 수수료 구간 시작은 사이클마다 앞으로만 움직이므로 다음 탐색의 하한으로는 직전 결과 근처면 충분하다
+BLOCK_TIMES_KEEP_MARGIN = 1000
+
+
+class BlockTimeResolver:
+    """
+    timestamp -> block number 변환기.
+    - 블록 번호/타임스탬프 쌍을 프로세스 내 dict 와 Mongo(block_times)에 저장
+    - 저장된 쌍으로 목표 시각을 감싸는 구간을 잡은 뒤 보간 + 이분 탐색으로 좁힌다
+    한 번 resolve 한 결과는 같은 실행 안의 모든 풀이 공유하면 된다.
+    프로세스 내 dict 는 탐색 결과 - BLOCK_TIMES_KEEP_MARGIN 보다 이전 블록을 버려 크기가 일정하게 유지된다.
+    """
+
+    def __init__(self, w3: AsyncWeb3, persist: bool = True):
+        self.w3 = w3
+        self.col = get_mongo()["block_times"] if persist else None
+        self._timestamps: Dict[int, int] = {}
+        self._dirty: Dict[int, int] = {}
+        self.rpc_calls = 0
+
+    async def ensure_indexes(self):
+        if self.col is None:
+            return
+        await self.col.create_index([("block_number", ASCENDING)], unique=True)
+        await self.col.create_index([("timestamp", ASCENDING)])
+
+    # ============ 단건 조회 ============
+    async def timestamp(self, block_number: int) -> int:
+        ts = self._timestamps.get(block_number)
+        if ts is None:
+            block = await self.w3.eth.get_block(block_number)
+            self.rpc_calls += 1
+            ts = int(block["timestamp"])
+            self._remember(block_number, ts)
+        return ts
+
+    async def latest(self) -> Tuple[int, int]:
+        block = await self.w3.eth.get_block("latest")
+        self.rpc_calls += 1
+        number, ts = int(block["number"]), int(block["timestamp"])
+        self._remember(number, ts)
+        return number, ts
+
+    def _remember(self, block_number: int, ts: int):
+        self._timestamps[block_number] = ts
+        self._dirty[block_number] = ts
+
+    # ============ 탐색 ============
+    async def block_at_or_before(
+        self, target_ts: int, latest: Optional[Tuple[int, int]] = None
+    ) -> int:
+        """
+        timestamp <= target_ts 인 가장 큰 블록 번호.
+        """
+        hi, hi_ts = latest or await self.latest()
+        if target_ts >= hi_ts:
+            return hi
+
+        lo, lo_ts = await self._lower_bracket(target_ts, hi, hi_ts)
+        # 불변식: ts(lo) <= target_ts < ts(hi)
+        use_interpolation = True
+        while hi - lo > 1:
+            if use_interpolation and hi_ts > lo_ts:
+                guess = lo + (target_ts - lo_ts) * (hi - lo) // (hi_ts - lo_ts)
+                mid = min(max(guess, lo + 1), hi - 1)
+            else:
+                mid = (lo + hi) // 2
+            # 보간이 한쪽으로 치우쳐 수렴이 느려지는 경우를 막기 위해 이분 탐색과 번갈아 사용
+            use_interpolation = not use_interpolation
+
+            mid_ts = await self.timestamp(mid)
+            if mid_ts <= target_ts:
+                lo, lo_ts = mid, mid_ts
+            else:
+                hi, hi_ts = mid, mid_ts
+
+        await self.flush()
+        self.prune(lo - BLOCK_TIMES_KEEP_MARGIN)
+        return lo
+
+    def prune(self, below_block: int):
+        """
+        below_block 미만 블록의 쌍을 dict 에서 제거 (flush 이후에 호출해 저장 전 쌍은 잃지 않는다).
+        """
+        self._timestamps = {
+            n: ts for n, ts in self._timestamps.items() if n >= below_block
+        }
+
+    async def _lower_bracket(
+        self, target_ts: int, hi: int, hi_ts: int
+    ) -> Tuple[int, int]:
+        # 1) 저장된 쌍 중 target 이하에서 가장 가까운 블록
+        known = await self._known_at_or_before(target_ts)
+        if known is not None and known[0] < hi:
+            return known
+
+        # 2) 최근 블록 간격으로 추정한 뒤 target 아래로 내려갈 때까지 범위를 넓힘
+        sample = max(hi - 1000, 0)
+        sample_ts = await self.timestamp(sample)
+        block_time = max((hi_ts - sample_ts) / max(hi - sample, 1), 1e-3)
+        step = max(int((hi_ts - target_ts) / block_time), 1)
+        while True:
+            lo = max(hi - step, 0)
+            lo_ts = await self.timestamp(lo)
+            if lo_ts <= target_ts or lo == 0:
+                return lo, lo_ts
+            step *= BRACKET_GROWTH
+
+    async def _known_at_or_before(self, target_ts: int) -> Optional[Tuple[int, int]]:
+        candidates = [(n, ts) for n, ts in self._timestamps.items() if ts <= target_ts]
+        best = max(candidates) if candidates else None
+        if self.col is not None:
+            doc = await self.col.find_one(
+                {"timestamp": {"$lte": target_ts}},
+                sort=[("timestamp", DESCENDING), ("block_number", DESCENDING)],
+            )
+            if doc is not None:
+                pair = (int(doc["block_number"]), int(doc["timestamp"]))
+                self._timestamps.setdefault(*pair)
+                if best is None or pair[0] > best[0]:
+                    best = pair
+        return best
+
+    async def flush(self):
+        if self.col is None or not self._dirty:
+            return
+        ops = [
+            UpdateOne(
+                {"block_number": n}, {"$set": {"timestamp": ts}}, upsert=True
+            )
+            for n, ts in self._dirty.items()
+        ]
+        self._dirty = {}
+        try:
+            await self.col.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.info(f"⚠️ failed to persist block times: {e}", exc_info=True)
@@ -0,0 +1,149 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Set
+from pymongo import ASCENDING, DESCENDING
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+from .shard import SHARD_WORKER_TTL_SEC
+import os
+import time
+import uuid
+
+logger = configure_logging(__name__)
+
+# 이보다 오래 갱신되지 않은 미완료 실행은 이어받지 않고 새로 시작 (고정 블록이 너무 오래됨). 0 이하면 이어받기 끔
+INDEXER_RESUME_MAX_AGE_SEC = float(os.getenv("INDEXER_RESUME_MAX_AGE_SEC", "900"))
+
+RUN_RUNNING = "running"
+RUN_DONE = "done"
+RUN_ABANDONED = "abandoned"
+
+
+@dataclass
+class IndexRun:
+    run_id: str
+    scope: str
+    start_block: int
+    latest_block: int
+    completed: Set[str] = field(default_factory=set)  # 소문자 풀 주소
+    resumed: bool = False
+
+    def is_done(self, pool_address: str) -> bool:
+        return pool_address.lower() in self.completed
+
+
+class RunCheckpointStore:
+    """
+    인덱서 실행(사이클) 진행 상황을 indexer_runs 컬렉션에 기록한다.
+    - 실행 시작 시 run_id, 고정 블록(start_block, latest_block)을 남기고
+    - 쓰기가 반영된(또는 변경 없음으로 확인된) 풀을 completed 에 누적
+    - 정상 종료하면 done, 중간에 죽으면 running 으로 남아 다음 실행이 같은 블록에서 이어받는다
+    scope 는 샤딩 시 워커 id, 아니면 "default" 라서 워커마다 자기 실행만 이어받는다.
+    """
+
+    def __init__(self, max_age: float = INDEXER_RESUME_MAX_AGE_SEC):
+        self.col = get_mongo()["indexer_runs"]
+        self.max_age = max_age
+
+    async def ensure_indexes(self):
+        await self.col.create_index([("run_id", ASCENDING)], unique=True)
+        await self.col.create_index(
+            [("scope", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING)]
+        )
+
+    async def resume(self, scope: str) -> Optional[IndexRun]:
+        doc = await self.col.find_one(
+            {"scope": scope, "status": RUN_RUNNING}, sort=[("updated_at", DESCENDING)]
+        )
+        if doc is None:
+            return None
+        age = time.time() - doc["updated_at"]
+        if self.max_age <= 0 or age > self.max_age:
+            await self.col.update_one(
+                {"run_id": doc["run_id"]}, {"$set": {"status": RUN_ABANDONED}}
+            )
+            logger.info(
+                f"[checkpoint] run {doc['run_id']} abandoned "
+                f"({len(doc.get('completed', []))} pools done, {age:.0f}s old)"
+            )
+            return None
+        return IndexRun(
+            run_id=doc["run_id"],
+            scope=scope,
+            start_block=int(doc["start_block"]),
+            latest_block=int(doc["latest_block"]),
+            completed=set(doc.get("completed", [])),
+            resumed=True,
+        )
+
+    async def begin(self, scope: str, start_block: int, latest_block: int) -> IndexRun:
+        # 지난 실행 기록은 scope 당 하나만 남긴다
+        await self.col.delete_many({"scope": scope, "status": {"$ne": RUN_RUNNING}})
+        # 다른 scope 라도 이어받을 수 없을 만큼 오래된 기록은 정리
+        # (샤딩 시 기본 worker id 가 hostname:pid 라 재시작한 워커의 기록은 다시 읽히지 않는다)
+        # 살아 있는 워커의 진행 중 실행을 지우지 않도록 최소 워커 TTL 만큼은 남긴다. 이어받기를 껐으면 건너뜀
+        if self.max_age > 0:
+            await self.col.delete_many(
+                {
+                    "scope": {"$ne": scope},
+                    "updated_at": {
+                        "$lt": time.time() - max(self.max_age, SHARD_WORKER_TTL_SEC)
+                    },
+                }
+            )
+        run = IndexRun(
+            run_id=uuid.uuid4().hex,
+            scope=scope,
+            start_block=start_block,
+            latest_block=latest_block,
+        )
+        now = time.time()
+        await self.col.insert_one(
+            {
+                "run_id": run.run_id,
+                "scope": scope,
+                "status": RUN_RUNNING,
+                "start_block": start_block,
+                "latest_block": latest_block,
+                "completed": [],
+                "started_at": now,
+                "updated_at": now,
+            }
+        )
+        return run
+
+    async def repin(self, run: IndexRun, start_block: int, latest_block: int):
+        """
+        완료 목록은 유지하고 고정 블록만 교체 (이어받은 블록의 상태를 노드가 더 이상 제공하지 않을 때).
+        """
+        await self.col.update_one(
+            {"run_id": run.run_id},
+            {
+                "$set": {
+                    "start_block": start_block,
+                    "latest_block": latest_block,
+                    "updated_at": time.time(),
+                }
+            },
+        )
+        run.start_block = start_block
+        run.latest_block = latest_block
+        run.resumed = False
+
+    async def mark(self, run: IndexRun, pool_addresses: Iterable[str]):
+        new = {a.lower() for a in pool_addresses} - run.completed
+        if not new:
+            return
+        await self.col.update_one(
+            {"run_id": run.run_id},
+            {
+                "$addToSet": {"completed": {"$each": sorted(new)}},
+                "$set": {"updated_at": time.time()},
+            },
+        )
+        run.completed |= new
+
+    async def finish(self, run: IndexRun):
+        await self.col.update_one(
+            {"run_id": run.run_id},
+            {"$set": {"status": RUN_DONE, "updated_at": time.time()}},
+        )
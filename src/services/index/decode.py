@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Swap 이벤트 data: (int256 amount0, int256 amount1, uint160 sqrtPriceX96, uint128 liquidity, int24 tick)
+SWAP_DATA_WORDS = 5
+SWAP_DATA_SIZE = SWAP_DATA_WORDS * 32
+# 32바이트 word 하나 = 32비트 limb 8개 (big-endian, 0 이 최상위)
+LIMBS_PER_WORD = 8
+LIMB_MASK = np.uint64(0xFFFFFFFF)
+
+
+@dataclass
+class SwapColumns:
+    """
+    Swap 로그를 컬럼 단위로 디코딩한 결과.
+    256비트 값은 float 로 바꾸지 않고 uint32 limb 배열(big-endian)로 들고 있어 정밀도 손실이 없다.
+    """
+
+    block_number: np.ndarray  # (n,) int64
+    amount0_negative: np.ndarray  # (n,) bool
+    amount1_negative: np.ndarray  # (n,) bool
+    abs_amount0: np.ndarray  # (n, 8) uint32 limbs of |amount0|
+    abs_amount1: np.ndarray  # (n, 8) uint32 limbs of |amount1|
+    sqrt_price_x96: np.ndarray  # (n, 5) uint32 limbs (uint160)
+    liquidity: np.ndarray  # (n, 4) uint32 limbs (uint128)
+    tick: np.ndarray  # (n,) int32
+
+    def __len__(self) -> int:
+        return len(self.block_number)
+
+
+def limbs_to_int(limbs) -> int:
+    """
+    big-endian limb 들(32비트 단위, 합산으로 32비트를 넘어도 됨)을 파이썬 int 로 합친다.
+    """
+    value = 0
+    for limb in limbs:
+        value = (value << 32) + int(limb)
+    return value
+
+
+def _abs_twos_complement(words: np.ndarray, negative: np.ndarray) -> np.ndarray:
+    # 음수는 ~x + 1. 최하위 limb 부터 carry 를 올리며 8개 limb 만 순회 (행 방향은 벡터 연산)
+    inverted = np.where(negative[:, None], ~words, words).astype(np.uint64)
+    out = np.empty(words.shape, dtype=np.uint32)
+    carry = negative.astype(np.uint64)
+    for k in range(LIMBS_PER_WORD - 1, -1, -1):
+        v = inverted[:, k] + carry
+        out[:, k] = (v & LIMB_MASK).astype(np.uint32)
+        carry = v >> np.uint64(32)
+    return out
+
+
+def decode_swap_logs(logs: List[Dict[str, Any]]) -> SwapColumns:
+    """
+    Swap 로그 data 를 한 번에 (n, 40) uint32 행렬로 펼쳐 필드별 컬럼을 만든다.
+    data 길이가 맞지 않는 로그는 건너뛴다.
+    """
+    datas = []
+    blocks = []
+    for log in logs:
+        data = bytes(log["data"])  # HexBytes → bytes
+        if len(data) != SWAP_DATA_SIZE:
+            continue
+        datas.append(data)
+        blocks.append(int(log["blockNumber"]))
+
+    n = len(datas)
+    words = (
+        np.frombuffer(b"".join(datas), dtype=">u4")
+        .reshape(n, SWAP_DATA_WORDS, LIMBS_PER_WORD)
+        .astype(np.uint32)
+    )
+    amount0, amount1 = words[:, 0], words[:, 1]
+    negative0 = (amount0[:, 0] >> 31).astype(bool)
+    negative1 = (amount1[:, 0] >> 31).astype(bool)
+    return SwapColumns(
+        block_number=np.asarray(blocks, dtype=np.int64),
+        amount0_negative=negative0,
+        amount1_negative=negative1,
+        abs_amount0=_abs_twos_complement(amount0, negative0),
+        abs_amount1=_abs_twos_complement(amount1, negative1),
+        sqrt_price_x96=words[:, 2, 3:],
+        liquidity=words[:, 3, 4:],
+        # int24 는 int256 으로 부호 확장되어 있으므로 하위 32비트를 int32 로 보면 된다
+        tick=words[:, 4, 7].view(np.int32),
+    )
+
+
+def aggregate_by_block(cols: SwapColumns) -> Dict[int, List[int]]:
+    """
+    반환: block_number -> [swap 수, sum(|amount0|), sum(|amount1|)] (정수)
+    limb 별로 uint64 에 합산하므로 2^32 개 미만의 swap 까지 오버플로 없이 정확하다.
+    """
+    if len(cols) == 0:
+        return {}
+    blocks, inverse = np.unique(cols.block_number, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(blocks))
+    sums0 = np.zeros((len(blocks), LIMBS_PER_WORD), dtype=np.uint64)
+    sums1 = np.zeros((len(blocks), LIMBS_PER_WORD), dtype=np.uint64)
+    np.add.at(sums0, inverse, cols.abs_amount0)
+    np.add.at(sums1, inverse, cols.abs_amount1)
+    return {
+        int(block): [int(count), limbs_to_int(s0), limbs_to_int(s1)]
+        for block, count, s0, s1 in zip(blocks, counts, sums0, sums1)
+    }
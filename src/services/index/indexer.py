@@ -0,0 +1,403 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from web3 import AsyncWeb3
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+from hypurrquant.db.redis import get_redis_async
+from hypurrquant.evm import Web3Ctx
+from models.pool_info import PoolInfoModel
+from .blocks import BlockTimeResolver
+from .checkpoint import IndexRun, RunCheckpointStore
+from .multicall import BlockCallCache
+from .fees import FEE_ENGINE, get_fees_from_fee_growth
+from .schedule import RefreshScheduler
+from .shard import INDEXER_SHARDED, ShardMembership
+from .swaps import SwapIndexer
+from .writes import BulkTvlWriter
+from .tvl import (
+    get_fees_last_hour,
+    get_tvl_many,
+    resolve_fee_window,
+)
+from ..pools import HybraPoolInfoFetcher
+from ..tokens import TokenRegistry
+from utils.rpc_pool import use_rpc_pool
+import asyncio
+import os
+import signal
+import time
+
+logger = configure_logging(__name__)
+
+# 사이클 간격(초). 0 이하이면 한 번만 실행하고 종료
+FETCH_INTERVAL = float(os.getenv("FETCH_INTERVAL", "0"))
+# 풀 단위 작업(수수료 계산 + 저장)을 동시에 처리하는 worker 수
+INDEXER_CONCURRENCY = int(os.getenv("INDEXER_CONCURRENCY", "20"))
+
+
+@dataclass
+class CycleStats:
+    pools: int = 0
+    processed: int = 0
+    failed: int = 0
+    lease_lost: int = 0  # 처리 중 lease 를 다른 워커에 빼앗겨 건너뛴 풀
+    ok: bool = True
+    run_id: str = ""
+    resumed: int = 0  # 이어받은 실행에서 이미 끝나 있던 풀 수
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+class TvlIndexer:
+    """
+    tvl 컬렉션을 주기적으로 갱신하는 인덱서.
+    - Web3/Mongo/Redis 연결, 블록 시간/Swap 인덱서는 프로세스 수명 동안 재사용
+    - scheduler 가 없으면 매 사이클 모든 풀을 갱신, 있으면 활동량 기반으로 고른 풀만 갱신
+    - 풀 단위 작업은 bounded queue + worker 로 흘려보내 느린 풀이 다른 풀을 막지 않게 한다
+    - shard 가 있으면 consistent hashing + Redis lease 로 내 몫인 풀만 처리 (여러 프로세스/노드로 수평 확장)
+    - 실행마다 진행 상황(run id, 고정 블록, 완료 풀)을 체크포인트로 남기고, 중간에 죽으면 다음 실행이 이어받는다
+    """
+
+    def __init__(
+        self,
+        web3ctx: Web3Ctx,
+        w3: AsyncWeb3,
+        concurrency: int = INDEXER_CONCURRENCY,
+        scheduler: Optional[RefreshScheduler] = None,
+        shard: Optional[ShardMembership] = None,
+    ):
+        self.web3ctx = web3ctx
+        self.scheduler = scheduler
+        self.shard = shard
+        self.w3 = w3
+        self.concurrency = max(1, concurrency)
+        self.tvl_col = get_mongo()["tvl"]
+        self.redis = get_redis_async()
+        self.fetcher = HybraPoolInfoFetcher()
+        self.resolver = BlockTimeResolver(w3)
+        self.swap_indexer = SwapIndexer(w3)
+        # 사이클은 latest_block 하나에 고정되고, 같은 블록의 eth_call 결과는 재사용
+        self.call_cache = BlockCallCache()
+        self.checkpoints = RunCheckpointStore()
+        self.run: Optional[IndexRun] = None
+        self._stopping = asyncio.Event()
+
+    async def setup(self):
+        await self.resolver.ensure_indexes()
+        await self.swap_indexer.ensure_indexes()
+        await TokenRegistry().ensure_indexes()
+        await self.checkpoints.ensure_indexes()
+
+    def stop(self):
+        self._stopping.set()
+
+    # ============ 실행 루프 ============
+    async def run_forever(self, interval: float = FETCH_INTERVAL):
+        while not self._stopping.is_set():
+            stats = await self.run_cycle_safely()
+            delay = max(interval - stats.elapsed, 0)
+            try:
+                # stop() 이 불리면 대기 없이 바로 종료
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_cycle_safely(self) -> CycleStats:
+        try:
+            return await self.run_cycle()
+        except Exception as e:
+            run = self.run
+            if run is None:
+                logger.exception(f"[indexer] cycle failed before a run started: {e}")
+                return CycleStats(ok=False)
+            # 어디까지 끝났는지 남긴다. 다음 실행은 같은 블록에서 남은 풀만 처리한다
+            logger.exception(
+                f"[indexer] run {run.run_id} failed at block {run.latest_block} "
+                f"after {len(run.completed)} completed pools, will resume: {e}"
+            )
+            return CycleStats(ok=False, run_id=run.run_id)
+
+    async def run_cycle(self) -> CycleStats:
+        self.run = None
+        pools = [p for p in await self.fetcher.get_all() if p.fee is not None]
+        if self.shard is None:
+            return await self._index(pools)
+
+        pools = await self.shard.claim(pools)
+        try:
+            return await self._index(pools)
+        finally:
+            # 다음 사이클 전에 ring 이 바뀌었으면 새 소유자가 바로 가져갈 수 있도록 반납
+            await self.shard.release()
+
+    async def _begin_run(self) -> IndexRun:
+        """
+        같은 scope 의 미완료 실행이 있으면 그 고정 블록과 완료 목록을 이어받고, 없으면 새 실행을 시작.
+        """
+        scope = self.shard.worker_id if self.shard is not None else "default"
+        run = await self.checkpoints.resume(scope)
+        if run is not None:
+            logger.info(
+                f"[indexer] resuming run {run.run_id} at block {run.latest_block} "
+                f"({len(run.completed)} pools already done)"
+            )
+            return run
+        start_block, latest_block = await resolve_fee_window(self.w3, self.resolver)
+        logger.info(
+            f"[indexer] fee window {start_block}..{latest_block} "
+            f"({self.resolver.rpc_calls} get_block calls so far)"
+        )
+        return await self.checkpoints.begin(scope, start_block, latest_block)
+
+    async def _mark_completed(self, pool_addresses: List[str]):
+        # 실제로 반영(flush)된 풀만 갱신 완료로 본다
+        if self.scheduler is not None:
+            self.scheduler.mark_refreshed(pool_addresses, self.run.latest_block)
+        # 체크포인트 기록 실패는 다음 실행에서 다시 처리될 뿐이므로 쓰기를 실패시키지 않는다
+        try:
+            await self.checkpoints.mark(self.run, pool_addresses)
+        except Exception as e:
+            logger.exception(f"[indexer] checkpoint update failed: {e}")
+
+    async def _read_tvls(
+        self, run: IndexRun, pools: List[PoolInfoModel]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        고정 블록 기준 잔고 조회. 이어받은 실행의 고정 블록은 오래되어 노드가 과거 상태 eth_call 을
+        거부할 수 있으므로, 그때는 완료 목록은 유지한 채 새 블록으로 다시 고정하고 한 번 더 읽는다.
+        """
+        try:
+            tvls = await get_tvl_many(
+                self.web3ctx,
+                pools,
+                block_identifier=run.latest_block,
+                cache=self.call_cache,
+            )
+            if tvls or not pools or not run.resumed:
+                return tvls
+            error: Any = "no pool state readable"
+        except Exception as e:
+            if not run.resumed:
+                raise
+            error = e
+        logger.info(
+            f"[indexer] state at pinned block {run.latest_block} unavailable "
+            f"({error!r}), re-pinning run {run.run_id}"
+        )
+        start_block, latest_block = await resolve_fee_window(self.w3, self.resolver)
+        await self.checkpoints.repin(run, start_block, latest_block)
+        return await get_tvl_many(
+            self.web3ctx, pools, block_identifier=latest_block, cache=self.call_cache
+        )
+
+    async def _index(self, pools: List[PoolInfoModel]) -> CycleStats:
+        self.run = run = await self._begin_run()
+        start_block, latest_block = run.start_block, run.latest_block
+        stats = CycleStats(run_id=run.run_id)
+        if run.resumed:
+            done = [p for p in pools if run.is_done(p.pool_address)]
+            pools = [p for p in pools if not run.is_done(p.pool_address)]
+            stats.resumed = len(done)
+            if self.scheduler is not None:
+                self.scheduler.mark_refreshed(
+                    (p.pool_address for p in done), latest_block
+                )
+        if self.scheduler is not None:
+            activity = await self.scheduler.load_activity(
+                self.redis, pools, start_block, drain_all=self.shard is None
+            )
+            pools = self.scheduler.select(pools, latest_block, activity)
+        stats.pools = len(pools)
+        # 전체 풀의 잔고를 Multicall 로 한 번에 읽는다 (모든 읽기는 latest_block 기준)
+        tvls = await self._read_tvls(run, pools)
+        # 이어받은 블록의 상태를 읽지 못해 새로 고정했을 수 있다
+        start_block, latest_block = run.start_block, run.latest_block
+
+        # feeGrowthGlobal 로 계산 가능한 풀은 로그 스캔 없이 수수료를 구한다
+        fee_growth: Dict[str, Dict[str, float]] = {}
+        if FEE_ENGINE == "fee_growth":
+            fee_growth = await get_fees_from_fee_growth(
+                self.web3ctx,
+                pools,
+                {
+                    pool: (tvl["token0"]["decimals"], tvl["token1"]["decimals"])
+                    for pool, tvl in tvls.items()
+                },
+                start_block,
+                latest_block,
+                cache=self.call_cache,
+            )
+        # 나머지 풀의 Swap 로그를 주소 배치 단위로 먼저 동기화
+        # (이후 풀별 get_fees_last_hour 는 저장된 합계만 읽는다)
+        log_pools = [
+            p.pool_address
+            for p in pools
+            if AsyncWeb3.to_checksum_address(p.pool_address) not in fee_growth
+        ]
+        log_requests = await self.swap_indexer.sync_many(
+            log_pools, start_block, latest_block
+        )
+        logger.info(
+            f"[indexer] fees: {len(fee_growth)} pools via feeGrowth, "
+            f"{len(log_pools)} via swap logs ({log_requests} get_logs calls "
+            f"{self.swap_indexer.fetcher.stats.summary()})"
+        )
+
+        # 기존 값은 한 번에 읽어 두고, 결과는 bulk_write 로 모아서 쓴다
+        writer = BulkTvlWriter(self.tvl_col, self.redis, on_flush=self._mark_completed)
+        await writer.load_existing(p.pool_address for p in pools)
+        writer.start()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(
+                self._worker(
+                    queue, tvls, fee_growth, start_block, latest_block, writer, stats
+                )
+            )
+            for _ in range(self.concurrency)
+        ]
+        try:
+            for pool in pools:
+                await queue.put(pool)
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await writer.close()
+
+        await self.checkpoints.finish(run)
+        self.run = None
+        logger.info(
+            f"[indexer] run {run.run_id} done: {stats.processed}/{stats.pools} pools "
+            f"processed ({stats.resumed} resumed), {stats.failed} failed, "
+            f"{stats.lease_lost} skipped after losing the lease in "
+            f"{stats.elapsed:.1f}s at block {latest_block} "
+            f"{writer.summary()} cache={self.call_cache.summary()}"
+        )
+        return stats
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        tvls: Dict[str, Dict[str, Any]],
+        fee_growth: Dict[str, Dict[str, float]],
+        start_block: int,
+        latest_block: int,
+        writer: BulkTvlWriter,
+        stats: CycleStats,
+    ):
+        while True:
+            model: PoolInfoModel = await queue.get()
+            try:
+                if not self._owns(model):
+                    stats.lease_lost += 1
+                    continue
+                pool = AsyncWeb3.to_checksum_address(model.pool_address)
+                tvl = tvls.get(pool)
+                if tvl is None:
+                    stats.failed += 1
+                    continue
+                result = await self._process(
+                    model, tvl, fee_growth.get(pool), start_block, latest_block, writer
+                )
+                if result is None:
+                    stats.lease_lost += 1
+                elif result:
+                    stats.processed += 1
+                else:
+                    stats.failed += 1
+            finally:
+                queue.task_done()
+
+    def _owns(self, model: PoolInfoModel) -> bool:
+        return self.shard is None or self.shard.holds(model.pool_address)
+
+    async def _process(
+        self,
+        model: PoolInfoModel,
+        tvl: Dict[str, Any],
+        fees: Optional[Dict[str, float]],
+        start_block: int,
+        latest_block: int,
+        writer: BulkTvlWriter,
+    ) -> Optional[bool]:
+        """
+        반환: 처리 성공 True, 실패 False, 처리 중 lease 를 잃어 쓰지 않았으면 None
+        """
+        try:
+            fees = fees or await get_fees_last_hour(
+                self.web3ctx,
+                model,
+                start_block,
+                latest_block,
+                self.swap_indexer,
+                decimals=(tvl["token0"]["decimals"], tvl["token1"]["decimals"]),
+                # run_cycle 에서 sync_many 로 이미 동기화됨
+                synced=True,
+            )
+            # 수수료 계산 중에 lease 가 넘어갔을 수 있으므로 쓰기 직전에 한 번 더 확인
+            if not self._owns(model):
+                return None
+            await writer.put(model.pool_address, tvl, fees, block_number=latest_block)
+            return True
+        except Exception as e:
+            logger.exception(f"Error processing pool {model.pool_address}: {e}")
+            return False
+
+
+async def main(interval: Optional[float] = None) -> int:
+    """
+    FETCH_INTERVAL > 0 이면 데몬으로 계속 실행, 아니면 한 사이클만 실행.
+    """
+    from hypurrquant.db import init_db, close_db
+    from hypurrquant.evm import use_chain, Chain
+
+    interval = FETCH_INTERVAL if interval is None else interval
+    init_db()
+    try:
+        async with use_chain(Chain.HYPERLIQUID) as web3ctx:
+            # 데몬 모드에서만 활동량 기반 스케줄링 (한 번 실행은 모든 풀 갱신)
+            # RPC_POOL_URLS 가 있으면 여러 엔드포인트로 분산/hedge
+            w3 = use_rpc_pool(await web3ctx.get_w3())
+            daemon = interval > 0
+            indexer = TvlIndexer(
+                web3ctx,
+                w3,
+                scheduler=RefreshScheduler() if daemon else None,
+                # INDEXER_SHARDED=1 이면 같은 설정의 워커 여러 개가 풀을 나눠 처리
+                shard=(
+                    ShardMembership(get_redis_async())
+                    if daemon and INDEXER_SHARDED
+                    else None
+                ),
+            )
+            await indexer.setup()
+            if interval <= 0:
+                stats = await indexer.run_cycle_safely()
+                return 0 if stats.ok else 1
+
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, indexer.stop)
+            logger.info(f"[indexer] running every {interval}s")
+            if indexer.shard is not None:
+                await indexer.shard.start()
+            try:
+                await indexer.run_forever(interval)
+            finally:
+                if indexer.shard is not None:
+                    await indexer.shard.stop()
+            return 0
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,249 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List
+from web3 import AsyncWeb3
+from hypurrquant.logging_config import configure_logging
+import asyncio
+import os
+import time
+
+logger = configure_logging(__name__)
+
+# Swap 이벤트 토픽 (Uniswap V3 Pool)
+# event Swap(address indexed sender, address indexed recipient, int256 amount0, int256 amount1, uint160 sqrtPriceX96, uint128 liquidity, int24 tick)
+SWAP_TOPIC = AsyncWeb3.keccak(
+    text="Swap(address,address,int256,int256,uint160,uint128,int24)"
+).hex()
+
+# RPC 제공자마다 한도가 달라 환경변수로 조정
+LOG_CHUNK_INITIAL = int(os.getenv("LOG_CHUNK_INITIAL", "500"))
+LOG_CHUNK_MAX = int(os.getenv("LOG_CHUNK_MAX", "10000"))
+LOG_CHUNK_TARGET_RESULTS = int(os.getenv("LOG_CHUNK_TARGET_RESULTS", "2000"))
+LOG_FETCH_CONCURRENCY = int(os.getenv("LOG_FETCH_CONCURRENCY", "4"))
+LOG_FETCH_TIMEOUT_SEC = float(os.getenv("LOG_FETCH_TIMEOUT_SEC", "10"))
+# 백분위 계산에 쓰는 최근 요청 수 (fetcher 는 프로세스 수명 동안 재사용된다)
+LOG_STATS_WINDOW = 1000
+# rate limit 응답은 구간을 나누지 않고 같은 구간을 backoff 후 재시도 (넘기면 예외)
+LOG_RATE_LIMIT_RETRIES = int(os.getenv("LOG_RATE_LIMIT_RETRIES", "5"))
+LOG_RATE_LIMIT_BACKOFF_SEC = float(os.getenv("LOG_RATE_LIMIT_BACKOFF_SEC", "0.5"))
+
+# 제공자가 "결과가 너무 많다/범위가 너무 넓다"고 알릴 때 쓰는 문구들.
+# rate limit 문구("too many requests", "limit exceeded" 등)와 겹치지 않도록 구체적으로 적고,
+# 겹치더라도 _is_range_error 가 rate limit 여부를 먼저 확인한다
+_RANGE_ERROR_HINTS = (
+    "query returned more than",
+    "returned more than",
+    "too many results",
+    "response size exceeded",
+    "response size should not",
+    "response is too big",
+    "block range too large",
+    "block range is too large",
+    "block range too wide",
+    "exceed maximum block range",
+    "exceeds max block range",
+    "range exceeds",
+    # 제공자 쪽 timeout ("query timeout exceeded" 등) 도 구간이 무겁다는 신호
+    "query timeout",
+    "timeout",
+    "timed out",
+)
+# 쓰로틀링 응답. 구간을 줄여도 요청 수만 늘어나므로 split 하지 않는다
+_RATE_LIMIT_HINTS = (
+    "429",
+    "too many requests",
+    "rate limit",
+    "rate-limit",
+    "ratelimit",
+    "request limit",
+    "exceeded the quota",
+)
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    message = str(e).lower()
+    return any(hint in message for hint in _RATE_LIMIT_HINTS)
+
+
+def _is_range_error(e: Exception) -> bool:
+    # 우리 쪽 timeout 은 구간이 무겁다는 신호로 본다
+    if isinstance(e, asyncio.TimeoutError):
+        return True
+    if _is_rate_limited(e):
+        return False
+    message = str(e).lower()
+    return any(hint in message for hint in _RANGE_ERROR_HINTS)
+
+
+@dataclass
+class LogFetchStats:
+    requests: int = 0
+    splits: int = 0
+    grows: int = 0
+    throttled: int = 0
+    logs: int = 0
+    # 최근 LOG_STATS_WINDOW 개 요청만 보관
+    chunk_sizes: Deque[int] = field(
+        default_factory=lambda: deque(maxlen=LOG_STATS_WINDOW)
+    )
+    latencies: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=LOG_STATS_WINDOW)
+    )
+
+    def summary(self) -> Dict[str, Any]:
+        def pct(values, q):
+            if not values:
+                return 0
+            ordered = sorted(values)
+            return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+        return {
+            "requests": self.requests,
+            "splits": self.splits,
+            "grows": self.grows,
+            "throttled": self.throttled,
+            "logs": self.logs,
+            "chunk_p50": pct(self.chunk_sizes, 0.5),
+            "chunk_max": max(self.chunk_sizes, default=0),
+            "latency_p50": round(pct(self.latencies, 0.5), 3),
+            "latency_p95": round(pct(self.latencies, 0.95), 3),
+        }
+
+
+class LogRangeFetcher:
+    """
+    eth_getLogs 블록 구간을 적응적으로 나눠 동시에 가져오는 fetcher.
+    - 응답 로그 수가 목표치의 절반보다 적으면 다음 구간을 두 배로 키움 (최대 LOG_CHUNK_MAX)
+    - 결과 초과/범위 초과/timeout 이면 해당 구간을 반으로 나눠 다시 요청
+    - rate limit 이면 나누지 않고 같은 구간을 지수 backoff 로 재시도
+    - 동시에 나가는 요청 수는 concurrency 로 제한
+    구간 크기는 인스턴스에 유지되므로 한 실행 동안 같은 fetcher 를 재사용하면 학습한 값이 이어진다.
+    """
+
+    def __init__(
+        self,
+        initial_step: int = LOG_CHUNK_INITIAL,
+        max_step: int = LOG_CHUNK_MAX,
+        target_results: int = LOG_CHUNK_TARGET_RESULTS,
+        concurrency: int = LOG_FETCH_CONCURRENCY,
+        timeout: float = LOG_FETCH_TIMEOUT_SEC,
+        rate_limit_retries: int = LOG_RATE_LIMIT_RETRIES,
+        rate_limit_backoff: float = LOG_RATE_LIMIT_BACKOFF_SEC,
+    ):
+        self.step = max(1, initial_step)
+        self.max_step = max(self.step, max_step)
+        self.target_results = target_results
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.rate_limit_retries = rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
+        self.stats = LogFetchStats()
+        self._requests = asyncio.Semaphore(self.concurrency)
+
+    async def fetch(
+        self, w3, params: Dict[str, Any], start_block: int, end_block: int
+    ) -> List[Dict[str, Any]]:
+        """
+        params(address/topics)에 해당하는 [start_block, end_block] 로그를 블록 순서대로 반환.
+        """
+        if start_block > end_block:
+            return []
+        # 최상위 구간도 concurrency 개까지만 띄워, 앞선 응답으로 조정된 step 이 뒤 구간에 반영되게 한다
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def run(lo: int, hi: int):
+            try:
+                return await self._fetch_range(w3, params, lo, hi)
+            finally:
+                slots.release()
+
+        cursor = start_block
+        try:
+            while cursor <= end_block:
+                await slots.acquire()
+                hi = min(cursor + self.step - 1, end_block)
+                tasks.append(asyncio.create_task(run(cursor, hi)))
+                cursor = hi + 1
+            chunks = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [log for chunk in chunks for log in chunk]
+
+    async def _fetch_range(
+        self, w3, params: Dict[str, Any], lo: int, hi: int
+    ) -> List[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            async with self._requests:
+                started = time.perf_counter()
+                try:
+                    logs = await asyncio.wait_for(
+                        w3.eth.get_logs({**params, "fromBlock": lo, "toBlock": hi}),
+                        timeout=self.timeout,
+                    )
+                    error = None
+                except Exception as e:
+                    error = e
+                self.stats.requests += 1
+                self.stats.chunk_sizes.append(hi - lo + 1)
+                self.stats.latencies.append(time.perf_counter() - started)
+
+            if error is None:
+                self.stats.logs += len(logs)
+                if len(logs) < self.target_results // 2 and self.step < self.max_step:
+                    self.step = min(self.step * 2, self.max_step)
+                    self.stats.grows += 1
+                return list(logs)
+            if not _is_rate_limited(error) or attempt >= self.rate_limit_retries:
+                break
+            # 슬롯을 놓은 상태로 기다려 다른 구간 요청도 함께 늦춰지지 않게 한다
+            delay = self.rate_limit_backoff * 2**attempt
+            attempt += 1
+            self.stats.throttled += 1
+            logger.debug(f"[logs] rate limited on {lo}..{hi}, retry in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        if not _is_range_error(error) or lo == hi:
+            raise error
+
+        # 구간을 반으로 나눠 재시도하고, 이후 구간도 작게 시작
+        mid = (lo + hi) // 2
+        self.step = max(1, min(self.step, mid - lo + 1))
+        self.stats.splits += 1
+        logger.debug(f"[logs] splitting {lo}..{hi} after {error!r}")
+        left, right = await asyncio.gather(
+            self._fetch_range(w3, params, lo, mid),
+            self._fetch_range(w3, params, mid + 1, hi),
+        )
+        return left + right
+
+
+async def get_logs_chunked(w3, address, topic, start_block, end_block, fetcher=None):
+    address = AsyncWeb3.to_checksum_address(address)
+    fetcher = fetcher or LogRangeFetcher()
+    return await fetcher.fetch(
+        w3, {"address": address, "topics": [topic]}, start_block, end_block
+    )
+
+
+async def get_logs_multi(w3, addresses, topic, start_block, end_block, fetcher=None):
+    """
+    여러 컨트랙트의 로그를 한 번의 eth_getLogs(address 리스트)로 가져와 주소별로 분리.
+    반환: checksum address -> logs (요청한 주소는 로그가 없어도 빈 리스트로 포함)
+    """
+    addresses = [AsyncWeb3.to_checksum_address(a) for a in addresses]
+    by_address = {a: [] for a in addresses}
+    if not addresses:
+        return by_address
+    fetcher = fetcher or LogRangeFetcher()
+    logs = await fetcher.fetch(
+        w3, {"address": addresses, "topics": [topic]}, start_block, end_block
+    )
+    for log in logs:
+        addr = AsyncWeb3.to_checksum_address(log["address"])
+        if addr in by_address:
+            by_address[addr].append(log)
+    return by_address
@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from web3 import AsyncWeb3
+from eth_abi import decode, encode
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.evm import Web3Utils, Web3Ctx
+import asyncio
+import os
+
+logger = configure_logging(__name__)
+
+# tryAggregate 한 번에 넣는 call 수 (노드의 eth_call gas/응답 크기 한도 고려)
+MULTICALL_BATCH_SIZE = int(os.getenv("MULTICALL_BATCH_SIZE", "500"))
+
+
+def selector(signature: str) -> bytes:
+    return bytes(AsyncWeb3.keccak(text=signature)[:4])
+
+
+@dataclass
+class _Call:
+    target: str
+    call_data: bytes
+    output_types: Tuple[str, ...]
+
+
+class MulticallPlan:
+    """
+    여러 view 호출을 모아 Multicall tryAggregate(False, ...) 로 한 번에 실행.
+    add() 가 돌려준 인덱스로 execute() 결과를 찾는다. 실패/디코드 실패한 call 은 None.
+    """
+
+    def __init__(self):
+        self._calls: List[_Call] = []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def add(
+        self,
+        target: str,
+        signature: str,
+        output_types: Sequence[str],
+        arg_types: Sequence[str] = (),
+        args: Sequence[Any] = (),
+    ) -> int:
+        call_data = selector(signature)
+        if arg_types:
+            call_data += encode(list(arg_types), list(args))
+        self._calls.append(
+            _Call(AsyncWeb3.to_checksum_address(target), call_data, tuple(output_types))
+        )
+        return len(self._calls) - 1
+
+    async def execute(
+        self,
+        web3ctx: Web3Ctx,
+        batch_size: int = MULTICALL_BATCH_SIZE,
+        block_identifier: int | str = "latest",
+        cache: Optional["BlockCallCache"] = None,
+    ) -> List[Optional[Tuple[Any, ...]]]:
+        """
+        block_identifier 가 블록 번호이고 cache 가 주어지면 (block, target, callData) 단위로
+        이미 읽은 결과를 재사용하고 나머지만 요청한다. 같은 plan 안의 중복 call 도 한 번만 보낸다.
+        """
+        if not self._calls:
+            return []
+        pinned = cache if isinstance(block_identifier, int) else None
+
+        keys = [(c.target, c.call_data) for c in self._calls]
+        known: Dict[Tuple[str, bytes], Optional[Tuple[Any, ...]]] = {}
+        unique: Dict[Tuple[str, bytes], _Call] = {}
+        for key, call in zip(keys, self._calls):
+            if key in known or key in unique:
+                continue
+            if pinned is not None and pinned.contains(block_identifier, key):
+                known[key] = pinned.get(block_identifier, key)
+            else:
+                unique[key] = call
+
+        pending = list(unique.items())
+        if pending:
+            multicall = await Web3Utils.get_multicall(web3ctx)
+            chunks = [
+                pending[i : i + batch_size] for i in range(0, len(pending), batch_size)
+            ]
+            responses = await asyncio.gather(
+                *(
+                    multicall.functions.tryAggregate(
+                        False,
+                        [
+                            {"target": c.target, "callData": c.call_data}
+                            for _, c in chunk
+                        ],
+                    ).call(block_identifier=block_identifier)
+                    for chunk in chunks
+                )
+            )
+            for chunk, response in zip(chunks, responses):
+                for (key, call), (success, ret) in zip(chunk, response):
+                    known[key] = _decode(call, success, ret)
+                    if pinned is not None:
+                        pinned.put(block_identifier, key, known[key])
+
+        return [known[key] for key in keys]
+
+
+class BlockCallCache:
+    """
+    블록 번호별 eth_call 결과 캐시. 같은 블록의 상태는 변하지 않으므로 TTL 없이 보관하고,
+    블록 수가 max_blocks 를 넘으면 가장 오래된 블록부터 버린다.
+    """
+
+    def __init__(self, max_blocks: int = 4):
+        self.max_blocks = max(1, max_blocks)
+        self._blocks: Dict[int, Dict[Tuple[str, bytes], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def contains(self, block: int, key: Tuple[str, bytes]) -> bool:
+        found = key in self._blocks.get(block, {})
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def get(self, block: int, key: Tuple[str, bytes]) -> Any:
+        return self._blocks[block][key]
+
+    def put(self, block: int, key: Tuple[str, bytes], value: Any):
+        entries = self._blocks.get(block)
+        if entries is None:
+            entries = self._blocks[block] = {}
+            while len(self._blocks) > self.max_blocks:
+                del self._blocks[min(self._blocks)]
+        entries[key] = value
+
+    def summary(self) -> Dict[str, int]:
+        return {"blocks": len(self._blocks), "hits": self.hits, "misses": self.misses}
+
+
+def _decode(call: _Call, success: bool, ret: bytes) -> Optional[Tuple[Any, ...]]:
+    if not success or not ret:
+        return None
+    try:
+        return tuple(decode(list(call.output_types), ret))
+    except Exception:
+        # bytes32 로 symbol 을 반환하는 구형 토큰 (MKR 등)
+        if call.output_types == ("string",) and len(ret) == 32:
+            return (bytes(ret).rstrip(b"\x00").decode("utf-8", errors="ignore"),)
+        return None
@@ -0,0 +1,201 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from web3 import AsyncWeb3
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+from models.pool_info import PoolInfoModel
+from .tvl import POOL_READS_KEY
+import math
+import os
+
+logger = configure_logging(__name__)
+
+# 가장 활발한 풀 / 가장 조용한 풀의 갱신 간격 (블록 수). 사이는 순위에 따라 기하 보간
+POOL_REFRESH_MIN_BLOCKS = int(os.getenv("POOL_REFRESH_MIN_BLOCKS", "5"))
+POOL_REFRESH_MAX_BLOCKS = int(os.getenv("POOL_REFRESH_MAX_BLOCKS", "3600"))
+# 사이클당 eth_call 예산 (Multicall 안의 개별 call 기준). 풀이 늘어도 사이클 부하는 이 값으로 고정
+INDEXER_CALL_BUDGET = int(os.getenv("INDEXER_CALL_BUDGET", "4000"))
+# 풀 하나 갱신에 드는 call 수 추정: balanceOf 2 + feeGrowth/liquidity 3 x 2블록
+POOL_REFRESH_CALL_COST = 8
+# API 조회 수는 사이클마다 절반씩 감쇠
+READS_DECAY = 0.5
+
+
+@dataclass
+class PoolActivity:
+    tvl_usd: float = 0.0
+    fee_usd: float = 0.0
+    swaps: int = 0
+    # 수수료 구간 동안의 수수료 / 잔고 (token0, token1 합). 모든 풀의 tvl 문서에 있어 엔진과 무관하게 쓸 수 있다
+    fee_turnover: float = 0.0
+    reads: float = 0.0
+
+    @property
+    def score(self) -> float:
+        # 규모 차이가 커서 log 스케일로 합산
+        return (
+            math.log1p(self.tvl_usd)
+            + math.log1p(self.fee_usd) * 2
+            + math.log1p(self.swaps)
+            + math.log1p(self.fee_turnover * 10_000) * 2  # bp 단위
+            + math.log1p(self.reads) * 2
+        )
+
+
+def _fee_turnover(tvl: Optional[dict], fees: Optional[dict]) -> float:
+    """
+    수수료 구간 동안 token0/token1 수수료를 각 잔고로 나눈 합. 토큰 단위가 약분되어 풀끼리 비교 가능하다.
+    """
+    if not tvl or not fees:
+        return 0.0
+    turnover = 0.0
+    for side in ("0", "1"):
+        balance = float((tvl.get(f"token{side}") or {}).get("balance") or 0)
+        fee = float(fees.get(f"fees_token{side}") or 0)
+        if balance > 0:
+            turnover += fee / balance
+    return turnover
+
+
+class RefreshScheduler:
+    """
+    풀별 활동량(TVL, 수수료, 수수료/잔고 비율, 최근 swap 수, API 조회 수)으로 갱신 우선순위를 정한다.
+    - 점수 순위가 높을수록 짧은 간격(min_blocks), 낮을수록 긴 간격(max_blocks)
+    - 간격이 지난 풀 중 밀린 정도가 큰 순으로, 사이클 call 예산 안에서만 선택
+    마지막 갱신 블록은 프로세스 메모리에 두므로 재시작 직후에는 모든 풀이 due 가 되고 예산만큼씩 처리된다.
+    """
+
+    def __init__(
+        self,
+        min_blocks: int = POOL_REFRESH_MIN_BLOCKS,
+        max_blocks: int = POOL_REFRESH_MAX_BLOCKS,
+        call_budget: int = INDEXER_CALL_BUDGET,
+    ):
+        self.min_blocks = max(1, min_blocks)
+        self.max_blocks = max(self.min_blocks, max_blocks)
+        self.call_budget = call_budget
+        self.last_refreshed: Dict[str, int] = {}
+        self.reads: Dict[str, float] = {}
+        db = get_mongo()
+        self.tvl_col = db["tvl"]
+        self.swap_col = db["swap_blocks"]
+
+    async def load_activity(
+        self,
+        redis,
+        pools: List[PoolInfoModel],
+        start_block: int,
+        drain_all: bool = True,
+    ) -> Dict[str, PoolActivity]:
+        """
+        drain_all=False 이면 API 조회 수 중 pools 몫만 가져간다 (샤딩 시 다른 워커 몫을 지우지 않도록).
+        """
+        keys = [p.pool_address.lower() for p in pools]
+        activity = {k: PoolActivity() for k in keys}
+
+        pool_addresses = [p.pool_address for p in pools]
+        # 1) 스냅샷 갱신 때 tvl 문서에 기록된 USD 지표 + 인덱서가 기록한 수수료/잔고 비율
+        async for doc in self.tvl_col.find(
+            {"pool_address": {"$in": pool_addresses}},
+            projection={"_id": 0, "pool_address": 1, "metrics": 1, "tvl": 1, "fees": 1},
+        ):
+            metrics = doc.get("metrics") or {}
+            a = activity.get(doc["pool_address"].lower())
+            if a is not None:
+                a.tvl_usd = float(metrics.get("tvl_usd") or 0)
+                a.fee_usd = float(metrics.get("total_fee_usd") or 0)
+                a.fee_turnover = _fee_turnover(doc.get("tvl"), doc.get("fees"))
+
+        # 2) 수수료 구간 안의 swap 수 (FEE_ENGINE=fee_growth 에서는 로그 스캔으로 떨어진 풀만 있음)
+        async for doc in self.swap_col.aggregate(
+            [
+                {
+                    "$match": {
+                        "pool_address": {
+                            "$in": [
+                                AsyncWeb3.to_checksum_address(a)
+                                for a in pool_addresses
+                            ]
+                        },
+                        "block_number": {"$gte": start_block},
+                    }
+                },
+                {"$group": {"_id": "$pool_address", "swaps": {"$sum": "$swaps"}}},
+            ]
+        ):
+            a = activity.get(str(doc["_id"]).lower())
+            if a is not None:
+                a.swaps = int(doc["swaps"])
+
+        # 3) API 조회 수: 지난 사이클 이후 누적분을 가져오고 비운 뒤 감쇠 합산
+        if drain_all:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hgetall(POOL_READS_KEY)
+                pipe.delete(POOL_READS_KEY)
+                raw, _ = await pipe.execute()
+        elif keys:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hmget(POOL_READS_KEY, keys)
+                pipe.hdel(POOL_READS_KEY, *keys)
+                values, _ = await pipe.execute()
+            raw = {k: v for k, v in zip(keys, values) if v is not None}
+        else:
+            raw = {}
+        fresh = {
+            (k.decode() if isinstance(k, bytes) else k).lower(): float(v)
+            for k, v in (raw or {}).items()
+        }
+        # 현재 풀 목록에 있는 주소만 유지 (임의 주소 조회로 dict 가 커지지 않도록)
+        self.reads = {
+            k: self.reads.get(k, 0.0) * READS_DECAY + fresh.get(k, 0.0)
+            for k in activity
+        }
+        for k, a in activity.items():
+            a.reads = self.reads[k]
+        return activity
+
+    def intervals(self, activity: Dict[str, PoolActivity]) -> Dict[str, int]:
+        """
+        점수 순위(0=가장 활발) q 에 대해 min * (max/min)^q 블록.
+        """
+        ranked = sorted(activity, key=lambda k: activity[k].score, reverse=True)
+        n = max(len(ranked) - 1, 1)
+        ratio = self.max_blocks / self.min_blocks
+        return {
+            k: int(round(self.min_blocks * ratio ** (rank / n)))
+            for rank, k in enumerate(ranked)
+        }
+
+    def select(
+        self,
+        pools: List[PoolInfoModel],
+        latest_block: int,
+        activity: Dict[str, PoolActivity],
+    ) -> List[PoolInfoModel]:
+        intervals = self.intervals(activity)
+        overdue: List[tuple] = []
+        for p in pools:
+            key = p.pool_address.lower()
+            score = activity[key].score if key in activity else 0.0
+            last = self.last_refreshed.get(key)
+            if last is None:
+                # 한 번도 갱신하지 않은 풀이 가장 먼저
+                overdue.append((math.inf, score, p))
+                continue
+            ratio = (latest_block - last) / intervals.get(key, self.max_blocks)
+            if ratio >= 1:
+                overdue.append((ratio, score, p))
+        # 밀린 정도가 같으면 점수가 높은 풀 먼저
+        overdue.sort(key=lambda x: (x[0], x[1]), reverse=True)
+
+        limit = max(self.call_budget // POOL_REFRESH_CALL_COST, 1)
+        selected = [p for _, _, p in overdue[:limit]]
+        logger.info(
+            f"[scheduler] {len(overdue)}/{len(pools)} pools due, "
+            f"refreshing {len(selected)} (budget {self.call_budget} calls)"
+        )
+        return selected
+
+    def mark_refreshed(self, pool_addresses: Iterable[str], block: int):
+        for addr in pool_addresses:
+            self.last_refreshed[addr.lower()] = block
@@ -0,0 +1,213 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from hypurrquant.logging_config import configure_logging
+from models.pool_info import PoolInfoModel
+import asyncio
+import bisect
+import hashlib
+import os
+import socket
+import time
+
+logger = configure_logging(__name__)
+
+# "1" 이면 데몬 인덱서가 다른 프로세스/노드와 풀을 나눠 처리
+INDEXER_SHARDED = os.getenv("INDEXER_SHARDED", "0") == "1"
+# 워커 식별자 (기본: hostname:pid). 재시작해도 같은 id 를 쓰면 자기 lease 를 바로 다시 가져간다
+INDEXER_WORKER_ID = os.getenv("INDEXER_WORKER_ID", "")
+# heartbeat 주기 / 이 시간 동안 heartbeat 가 없으면 떠난 워커로 본다
+SHARD_HEARTBEAT_SEC = float(os.getenv("SHARD_HEARTBEAT_SEC", "5"))
+SHARD_WORKER_TTL_SEC = float(os.getenv("SHARD_WORKER_TTL_SEC", "20"))
+# 풀 lease 유지 시간. heartbeat 마다 연장되므로 워커가 죽었을 때 넘어가기까지의 최대 시간이다
+SHARD_LEASE_TTL_SEC = float(os.getenv("SHARD_LEASE_TTL_SEC", "60"))
+# 워커당 가상 노드 수 (클수록 분배가 고르다)
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "128"))
+
+WORKERS_KEY = "hack:indexer:workers"
+LEASE_KEY_PREFIX = "hack:indexer:lease:"
+
+# 비어 있거나 내 것인 lease 만 (재)설정. 반환: 키별 1(획득)/0(다른 워커 소유)
+_CLAIM_SCRIPT = """
+local out = {}
+for i, key in ipairs(KEYS) do
+    local owner = redis.call('GET', key)
+    if (not owner) or owner == ARGV[1] then
+        redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+        out[i] = 1
+    else
+        out[i] = 0
+    end
+end
+return out
+"""
+# 내 것인 lease 만 삭제
+_RELEASE_SCRIPT = """
+local n = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        n = n + 1
+    end
+end
+return n
+"""
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    워커 id 를 가상 노드로 펼친 consistent hash ring.
+    워커가 추가/제거되면 그 워커 몫의 풀만 이동한다.
+    """
+
+    def __init__(self, members: Iterable[str], vnodes: int = SHARD_VNODES):
+        self.members = sorted(set(members))
+        points = sorted(
+            (_hash(f"{member}#{i}"), member)
+            for member in self.members
+            for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [m for _, m in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, _hash(key.lower())) % len(self._hashes)
+        return self._owners[idx]
+
+
+class ShardMembership:
+    """
+    Redis 기반 워커 멤버십 + 풀 lease.
+    - heartbeat: WORKERS_KEY(sorted set)에 마지막 heartbeat 시각을 기록, worker_ttl 이 지나면 제외
+    - 분배: 살아 있는 워커들로 만든 HashRing 에서 내 몫인 풀만 고른다 (워커 증감 시 자동 재분배)
+    - lease: 고른 풀마다 SET PX 로 소유권을 잡고, 이전 소유자가 아직 쥐고 있는 풀은 건너뛴다.
+      재분배 직후 두 워커가 같은 풀을 동시에 처리하지 않도록 하기 위함
+    """
+
+    def __init__(
+        self,
+        redis,
+        worker_id: str = INDEXER_WORKER_ID,
+        heartbeat_interval: float = SHARD_HEARTBEAT_SEC,
+        worker_ttl: float = SHARD_WORKER_TTL_SEC,
+        lease_ttl: float = SHARD_LEASE_TTL_SEC,
+        vnodes: int = SHARD_VNODES,
+    ):
+        self.redis = redis
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_ttl = worker_ttl
+        self.lease_ttl_ms = int(lease_ttl * 1000)
+        self.vnodes = vnodes
+        self.ring = HashRing([self.worker_id], vnodes)
+        self.held: Set[str] = set()
+        self.lost = 0
+        self._heartbeat: asyncio.Task | None = None
+        self._claim = redis.register_script(_CLAIM_SCRIPT)
+        self._release = redis.register_script(_RELEASE_SCRIPT)
+
+    # ============ 멤버십 ============
+    async def start(self):
+        await self.heartbeat()
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        logger.info(f"[shard] worker {self.worker_id} joined")
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        # 다른 워커가 lease 만료를 기다리지 않고 바로 가져가도록 정리
+        await self.release()
+        await self.redis.zrem(WORKERS_KEY, self.worker_id)
+        logger.info(f"[shard] worker {self.worker_id} left")
+
+    async def heartbeat(self):
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(WORKERS_KEY, {self.worker_id: now})
+            pipe.zremrangebyscore(WORKERS_KEY, "-inf", now - self.worker_ttl)
+            await pipe.execute()
+        # 처리 중인 풀의 lease 연장. 연장에 실패한 lease(만료 후 다른 워커가 가져감)는 놓는다
+        if self.held:
+            keys = list(self.held)
+            granted = await self._claim_keys(keys)
+            lost = [k for k, ok in zip(keys, granted) if not ok]
+            if lost:
+                self.held.difference_update(lost)
+                self.lost += len(lost)
+                logger.info(
+                    f"⚠️ [shard] {self.worker_id} lost {len(lost)} leases to other workers"
+                )
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.exception(f"[shard] heartbeat failed: {e}")
+
+    async def members(self) -> List[str]:
+        raw = await self.redis.zrangebyscore(
+            WORKERS_KEY, time.time() - self.worker_ttl, "+inf"
+        )
+        members = {m.decode() if isinstance(m, bytes) else m for m in raw}
+        members.add(self.worker_id)
+        return sorted(members)
+
+    # ============ 분배 / lease ============
+    async def refresh_ring(self) -> HashRing:
+        members = await self.members()
+        if members != self.ring.members:
+            logger.info(
+                f"[shard] membership changed: {len(self.ring.members)} -> "
+                f"{len(members)} workers {members}"
+            )
+            self.ring = HashRing(members, self.vnodes)
+        return self.ring
+
+    async def claim(self, pools: Sequence[PoolInfoModel]) -> List[PoolInfoModel]:
+        """
+        ring 에서 내 몫인 풀 중 lease 를 잡은 풀만 반환. 잡은 lease 는 release() 까지 heartbeat 로 연장된다.
+        """
+        ring = await self.refresh_ring()
+        mine = [p for p in pools if ring.owner(p.pool_address) == self.worker_id]
+        if not mine:
+            return []
+        keys = [LEASE_KEY_PREFIX + p.pool_address.lower() for p in mine]
+        granted = await self._claim_keys(keys)
+        claimed = [p for p, ok in zip(mine, granted) if ok]
+        self.held = {k for k, ok in zip(keys, granted) if ok}
+        logger.info(
+            f"[shard] {self.worker_id}: {len(claimed)}/{len(mine)} owned pools leased "
+            f"({len(pools)} total, {len(ring.members)} workers)"
+        )
+        return claimed
+
+    def holds(self, pool_address: str) -> bool:
+        """
+        이 워커가 아직 lease 를 쥐고 있는 풀인지. 잃었다면 처리/쓰기를 멈춰야 한다.
+        """
+        return LEASE_KEY_PREFIX + pool_address.lower() in self.held
+
+    async def _claim_keys(self, keys: List[str]) -> List[bool]:
+        result = await self._claim(keys=keys, args=[self.worker_id, self.lease_ttl_ms])
+        return [bool(int(r)) for r in result]
+
+    async def release(self):
+        held, self.held = self.held, set()
+        if held:
+            await self._release(keys=list(held), args=[self.worker_id])
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "workers": len(self.ring.members),
+            "leased": len(self.held),
+            "lost": self.lost,
+        }
@@ -0,0 +1,201 @@
+from typing import Any, Dict, List, Tuple
+from web3 import AsyncWeb3
+from pymongo import ASCENDING, UpdateOne
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+from .decode import aggregate_by_block, decode_swap_logs
+from .logs import (
+    SWAP_TOPIC,
+    LogFetchStats,
+    LogRangeFetcher,
+    get_logs_chunked,
+    get_logs_multi,
+)
+import asyncio
+import os
+
+logger = configure_logging(__name__)
+
+# eth_getLogs 한 번에 넣는 풀 주소 수
+LOG_ADDRESS_BATCH_SIZE = int(os.getenv("LOG_ADDRESS_BATCH_SIZE", "50"))
+# 이 개수 이상의 로그는 스레드에서 디코딩
+SWAP_DECODE_THREAD_MIN = int(os.getenv("SWAP_DECODE_THREAD_MIN", "5000"))
+
+
+def aggregate_swap_logs(logs: List[Dict[str, Any]]) -> Dict[int, List[int]]:
+    """
+    Swap 로그를 블록 단위로 합산.
+    반환: block_number -> [swap 수, sum(|amount0|), sum(|amount1|)] (정수 그대로 유지)
+    """
+    return aggregate_by_block(decode_swap_logs(logs))
+
+
+async def aggregate_swap_logs_async(
+    logs: List[Dict[str, Any]],
+) -> Dict[int, List[int]]:
+    # 로그가 많으면 디코딩/합산을 스레드로 넘겨 이벤트 루프를 막지 않는다
+    if len(logs) >= SWAP_DECODE_THREAD_MIN:
+        return await asyncio.to_thread(aggregate_swap_logs, logs)
+    return aggregate_swap_logs(logs)
+
+
+class SwapIndexer:
+    """
+    풀별 Swap 이벤트를 블록 단위 합계로 Mongo 에 누적하는 증분 인덱서.
+    - swap_checkpoints: 풀별 마지막으로 인덱싱한 블록
+    - swap_blocks     : (pool_address, block_number) 별 swap 수 / |amount| 합계
+    매 실행은 체크포인트 이후 블록만 조회하고, 수수료 구간 합계는 저장된 데이터로 계산한다.
+    uint256 범위 값은 Mongo int64 를 넘을 수 있어 10진 문자열로 저장한다.
+    """
+
+    def __init__(self, w3: AsyncWeb3, fetcher: LogRangeFetcher | None = None):
+        self.w3 = w3
+        self.fetcher = fetcher or LogRangeFetcher()
+        db = get_mongo()
+        self.checkpoint_col = db["swap_checkpoints"]
+        self.block_col = db["swap_blocks"]
+
+    async def ensure_indexes(self):
+        await self.checkpoint_col.create_index([("pool_address", ASCENDING)], unique=True)
+        await self.block_col.create_index(
+            [("pool_address", ASCENDING), ("block_number", ASCENDING)], unique=True
+        )
+
+    async def get_checkpoint(self, pool_address: str) -> int | None:
+        doc = await self.checkpoint_col.find_one({"pool_address": pool_address})
+        return int(doc["last_block"]) if doc else None
+
+    async def sync(self, pool_address: str, start_block: int, latest_block: int) -> int:
+        """
+        [start_block, latest_block] 구간 중 아직 인덱싱하지 않은 블록의 Swap 로그만 가져와 저장.
+        반환: 새로 조회한 블록 수
+        """
+        checkpoint = await self.get_checkpoint(pool_address)
+        from_block = start_block if checkpoint is None else max(start_block, checkpoint + 1)
+        if from_block > latest_block:
+            return 0
+
+        logs = await get_logs_chunked(
+            self.w3, pool_address, SWAP_TOPIC, from_block, latest_block, self.fetcher
+        )
+        await self.store(pool_address, await aggregate_swap_logs_async(logs))
+        await self.checkpoint_col.update_one(
+            {"pool_address": pool_address},
+            {"$set": {"last_block": latest_block}},
+            upsert=True,
+        )
+        # 수수료 구간 밖으로 밀려난 블록 정리
+        await self.block_col.delete_many(
+            {"pool_address": pool_address, "block_number": {"$lt": start_block}}
+        )
+        return latest_block - from_block + 1
+
+    async def sync_many(
+        self,
+        pool_addresses: List[str],
+        start_block: int,
+        latest_block: int,
+        batch_size: int = LOG_ADDRESS_BATCH_SIZE,
+    ) -> int:
+        """
+        sync 의 다중 풀 버전. 풀들을 batch_size 개씩 묶어 eth_getLogs 한 번에 조회하고
+        log.address 로 풀별로 나눠 저장한다. 반환: 이번 호출에서 보낸 eth_getLogs 요청 수
+        """
+        pool_addresses = [AsyncWeb3.to_checksum_address(a) for a in pool_addresses]
+        checkpoints = {
+            doc["pool_address"]: int(doc["last_block"])
+            async for doc in self.checkpoint_col.find(
+                {"pool_address": {"$in": pool_addresses}}
+            )
+        }
+        from_blocks = {
+            addr: max(start_block, checkpoints[addr] + 1)
+            if addr in checkpoints
+            else start_block
+            for addr in pool_addresses
+        }
+        pending = sorted(
+            (addr for addr in pool_addresses if from_blocks[addr] <= latest_block),
+            key=lambda a: from_blocks[a],
+        )
+
+        # 통계는 호출(사이클) 단위로 새로 집계 (학습한 구간 크기는 fetcher 에 유지)
+        self.fetcher.stats = LogFetchStats()
+        # 시작 블록이 비슷한 풀끼리 묶이도록 정렬한 뒤 배치로 자른다
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i : i + batch_size]
+            from_block = min(from_blocks[a] for a in batch)
+            by_address = await get_logs_multi(
+                self.w3, batch, SWAP_TOPIC, from_block, latest_block, self.fetcher
+            )
+
+            ops: List[UpdateOne] = []
+            for addr, logs in by_address.items():
+                # 배치 시작 블록이 이 풀의 체크포인트보다 앞설 수 있으므로 이미 본 블록은 제외
+                logs = [l for l in logs if int(l["blockNumber"]) >= from_blocks[addr]]
+                per_block = await aggregate_swap_logs_async(logs)
+                ops.extend(self._store_ops(addr, per_block))
+            if ops:
+                await self.block_col.bulk_write(ops, ordered=False)
+            await self.checkpoint_col.bulk_write(
+                [
+                    UpdateOne(
+                        {"pool_address": addr},
+                        {"$set": {"last_block": latest_block}},
+                        upsert=True,
+                    )
+                    for addr in batch
+                ],
+                ordered=False,
+            )
+
+        await self.block_col.delete_many(
+            {
+                "pool_address": {"$in": pool_addresses},
+                "block_number": {"$lt": start_block},
+            }
+        )
+        return self.fetcher.stats.requests
+
+    async def store(self, pool_address: str, per_block: Dict[int, List[int]]):
+        ops = self._store_ops(pool_address, per_block)
+        if ops:
+            await self.block_col.bulk_write(ops, ordered=False)
+
+    def _store_ops(
+        self, pool_address: str, per_block: Dict[int, List[int]]
+    ) -> List[UpdateOne]:
+        return [
+            UpdateOne(
+                {"pool_address": pool_address, "block_number": block_number},
+                {
+                    "$set": {
+                        "swaps": count,
+                        "abs_amount0": str(abs0),
+                        "abs_amount1": str(abs1),
+                    }
+                },
+                upsert=True,
+            )
+            for block_number, (count, abs0, abs1) in per_block.items()
+        ]
+
+    async def window_totals(
+        self, pool_address: str, start_block: int, latest_block: int
+    ) -> Tuple[int, int, int]:
+        """
+        반환: (swap 수, sum(|amount0|), sum(|amount1|)) — raw 단위 정수
+        """
+        cursor = self.block_col.find(
+            {
+                "pool_address": pool_address,
+                "block_number": {"$gte": start_block, "$lte": latest_block},
+            },
+            projection={"_id": 0, "swaps": 1, "abs_amount0": 1, "abs_amount1": 1},
+        )
+        count = abs0 = abs1 = 0
+        async for doc in cursor:
+            count += int(doc["swaps"])
+            abs0 += int(doc["abs_amount0"])
+            abs1 += int(doc["abs_amount1"])
+        return count, abs0, abs1
@@ -2,13 +2,19 @@ from web3 import AsyncWeb3
 from hypurrquant.utils.singleton import singleton
 from hypurrquant.logging_config import configure_logging
 from hypurrquant.db.mongo import get_mongo
-from hypurrquant.db import init_db, close_db
-from hypurrquant.evm import Web3Utils, Web3Ctx
+from hypurrquant.evm import Web3Ctx
 from models.pool_info import PoolInfoModel
 from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 from constants import ERC20_ABI
+from .blocks import BlockTimeResolver
+from .multicall import BlockCallCache, MulticallPlan
+from .swaps import SwapIndexer
+from ..tokens import TokenRegistry
 import asyncio
-import time
+import base64
+import json
 
 logger = configure_logging(__name__)
 # ------------------------
@@ -38,31 +44,34 @@ POOL_ABI = [
     },
 ]
 
-# Swap 이벤트 토픽 (Uniswap V3 Pool)
-# event Swap(address indexed sender, address indexed recipient, int256 amount0, int256 amount1, uint160 sqrtPriceX96, uint128 liquidity, int24 tick)
-SWAP_TOPIC = AsyncWeb3.keccak(
-    text="Swap(address,address,int256,int256,uint160,uint128,int24)"
-).hex()
+# 수수료 집계 구간 (초)
+FEE_WINDOW_SEC = 3600
 
+# 인덱서가 tvl 문서를 갱신할 때마다 pool_address 를 발행하는 Redis 채널 (services.live 구독)
+TVL_UPDATED_CHANNEL = "hack:tvl:updated"
+
+# API 가 풀 단건/배치 조회 수를 누적하는 Redis hash (인덱서 갱신 우선순위에 사용)
+POOL_READS_KEY = "hack:pool-reads"
 
 # ------------------------
 # 유틸 함수
 # ------------------------
-async def get_token_info(w3: AsyncWeb3, token_addr, pool_address):
+async def get_token_info(web3ctx: Web3Ctx, token_addr, pool_address):
     try:
+        w3 = await web3ctx.get_w3()
         pool_address = AsyncWeb3.to_checksum_address(pool_address)
         token_addr = AsyncWeb3.to_checksum_address(token_addr)
         token = w3.eth.contract(address=token_addr, abi=ERC20_ABI)
-        symbol, decimals, balance = await asyncio.gather(
-            token.functions.symbol().call(),
-            token.functions.decimals().call(),
-            token.functions.balanceOf(pool_address).call(),
-        )
-        balance = balance / (10**decimals)
+        # symbol/decimals 는 불변이므로 레지스트리에서 (최초 1회만 체인 조회)
+        meta = await TokenRegistry().get(web3ctx, token_addr)
+        if meta is None:
+            raise RuntimeError(f"Failed to read token metadata for {token_addr}")
+        balance = await token.functions.balanceOf(pool_address).call()
+        balance = balance / (10**meta.decimals)
         return {
             "address": token_addr,
-            "symbol": symbol,
-            "decimals": decimals,
+            "symbol": meta.symbol,
+            "decimals": meta.decimals,
             "balance": balance,
         }
     except Exception as e:
@@ -74,85 +83,132 @@ async def get_token_info(w3: AsyncWeb3, token_addr, pool_address):
 # TVL 계산 (USD 환산은 외부 가격 API 필요)
 # ------------------------
 async def get_tvl(web3ctx: Web3Ctx, model: PoolInfoModel):
-    w3 = await web3ctx.get_w3()
-    t0 = model.token0_address
-    t1 = model.token1_address
-    info0 = await get_token_info(w3, t0, model.pool_address)
-    info1 = await get_token_info(w3, t1, model.pool_address)
-    # 여기서는 USD 가격 API 연결해야 완전한 USD TVL 산출 가능
-    # 일단 토큰 개수만 리턴
-    return {"token0": info0, "token1": info1}
-
-
-async def get_logs_chunked(w3, address, topic, start_block, end_block, step=500):
-    address = AsyncWeb3.to_checksum_address(address)
-    all_logs = []
-    for from_block in range(start_block, end_block + 1, step):
-        to_block = min(from_block + step - 1, end_block)
-        logs = await w3.eth.get_logs(
-            {
-                "fromBlock": from_block,
-                "toBlock": to_block,
-                "address": address,
-                "topics": [topic],
-            }
+    tvls = await get_tvl_many(web3ctx, [model])
+    pool_address = AsyncWeb3.to_checksum_address(model.pool_address)
+    if pool_address not in tvls:
+        raise RuntimeError(f"Failed to read token balances for {pool_address}")
+    return tvls[pool_address]
+
+
+async def get_tvl_many(
+    web3ctx: Web3Ctx,
+    models: List[PoolInfoModel],
+    block_identifier: int | str = "latest",
+    cache: BlockCallCache | None = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 풀의 token0/token1 잔고를 Multicall 한 번(배치 단위)으로 조회.
+    - 토큰 메타데이터(symbol, decimals)는 TokenRegistry 에서 (처음 본 토큰만 체인 조회)
+    - balanceOf 는 (토큰, 풀) 쌍마다
+    block_identifier 를 고정하면 모든 풀의 token0/token1 잔고가 같은 블록 기준이 된다.
+    반환: checksum pool_address -> get_tvl 과 같은 형태. 읽기에 실패한 풀은 빠진다.
+    """
+    tokens = await TokenRegistry().get_many(
+        web3ctx,
+        (t for m in models for t in (m.token0_address, m.token1_address)),
+    )
+
+    plan = MulticallPlan()
+    balance_idx: Dict[str, Tuple[str, int, str, int]] = {}
+    for model in models:
+        pool = AsyncWeb3.to_checksum_address(model.pool_address)
+        t0 = AsyncWeb3.to_checksum_address(model.token0_address)
+        t1 = AsyncWeb3.to_checksum_address(model.token1_address)
+        balance_idx[pool] = (
+            t0,
+            plan.add(t0, "balanceOf(address)", ["uint256"], ["address"], [pool]),
+            t1,
+            plan.add(t1, "balanceOf(address)", ["uint256"], ["address"], [pool]),
         )
-        all_logs.extend(logs)
-    return all_logs
+
+    results = await plan.execute(
+        web3ctx, block_identifier=block_identifier, cache=cache
+    )
+
+    def token_info(token: str, balance_i: int):
+        if token not in tokens or results[balance_i] is None:
+            return None
+        meta = tokens[token]
+        return {
+            "address": token,
+            "symbol": meta.symbol,
+            "decimals": meta.decimals,
+            "balance": results[balance_i][0] / (10**meta.decimals),
+        }
+
+    tvls: Dict[str, Dict[str, Any]] = {}
+    for pool, (t0, b0, t1, b1) in balance_idx.items():
+        info0, info1 = token_info(t0, b0), token_info(t1, b1)
+        if info0 is None or info1 is None:
+            logger.info(f"⚠️ [tvl] failed to read token balances for {pool}")
+            continue
+        tvls[pool] = {"token0": info0, "token1": info1}
+    logger.info(
+        f"[tvl] read {len(tvls)}/{len(balance_idx)} pools with {len(plan)} calls "
+        f"({len(tokens)} unique tokens)"
+    )
+    return tvls
 
 
 # ------------------------
 # 최근 1시간 수수료 추정
 # ------------------------
-async def get_fees_last_hour(web3ctx: Web3Ctx, model: PoolInfoModel):
-    # 현재 블록
+async def resolve_fee_window(w3: AsyncWeb3, resolver: BlockTimeResolver | None = None):
+    """
+    (1시간 전 블록, 최신 블록). 한 번 계산해서 같은 실행의 모든 풀에 재사용한다.
+    """
+    resolver = resolver or BlockTimeResolver(w3)
+    latest_block, latest_ts = await resolver.latest()
+    start_block = await resolver.block_at_or_before(
+        latest_ts - FEE_WINDOW_SEC, latest=(latest_block, latest_ts)
+    )
+    return start_block, latest_block
+
+
+async def get_fees_last_hour(
+    web3ctx: Web3Ctx,
+    model: PoolInfoModel,
+    start_block: int | None = None,
+    latest_block: int | None = None,
+    swap_indexer: SwapIndexer | None = None,
+    decimals: Tuple[int, int] | None = None,
+    synced: bool = False,
+):
+    """
+    decimals: (token0, token1) decimals. get_tvl_many 로 이미 읽었다면 넘겨서 재조회를 생략.
+    synced: swap_indexer.sync_many 로 이미 latest_block 까지 동기화(+오래된 블록 정리)했으면 True.
+            저장된 합계만 읽고 풀별 체크포인트 조회/정리를 생략한다.
+    """
     w3 = await web3ctx.get_w3()
-    latest_block = await w3.eth.block_number
-    latest_ts = (await w3.eth.get_block(latest_block))["timestamp"]
-
-    # 1시간 전 타임스탬프
-    one_hour_ago = latest_ts - 3600
-
-    # 블록 범위 찾기 (간단하게 뒤로 스캔)
-    start_block = latest_block
-    while True:
-        block = await w3.eth.get_block(start_block)
-        if block["timestamp"] <= one_hour_ago:
-            break
-        start_block -= 50  # 블록 단위는 체인마다 조정
-
-    # Swap 이벤트 가져오기
-    logs = await get_logs_chunked(
-        w3, model.pool_address, SWAP_TOPIC, start_block, latest_block
+    if start_block is None or latest_block is None:
+        start_block, latest_block = await resolve_fee_window(w3)
+
+    # 체크포인트 이후 블록의 Swap 이벤트만 새로 가져와 저장하고,
+    # 1시간 구간 합계는 저장된 블록 단위 합계로 계산
+    swap_indexer = swap_indexer or SwapIndexer(w3)
+    pool_address = AsyncWeb3.to_checksum_address(model.pool_address)
+    if not synced:
+        await swap_indexer.sync(pool_address, start_block, latest_block)
+    _, abs_amount0, abs_amount1 = await swap_indexer.window_totals(
+        pool_address, start_block, latest_block
     )
 
-    # feeTier 읽기
-    fee = (model.fee or 10_000) / 1_000_000  # ex) 2500 -> 0.25%
+    # feeTier 읽기 (ppm) ex) 2500 -> 0.25%
+    fee_ppm = model.fee or 10_000
 
-    # 이벤트 디코딩 없이 amount0/1를 바로 쓰진 않고
     # 단순히 "거래량 × fee%"로 수수료 추정 (USD 변환은 별도)
-    total_fees_token0 = 0
-    total_fees_token1 = 0
-
-    for log in logs:
-        # input data: (amount0, amount1, sqrtPriceX96, liquidity, tick)
-        data_bytes = bytes(log["data"])  # HexBytes → bytes
-        # amount0, amount1은 int256이므로 32바이트씩
-        amount0 = int.from_bytes(data_bytes[0:32], byteorder="big", signed=True)
-        amount1 = int.from_bytes(data_bytes[32:64], byteorder="big", signed=True)
-        # 수수료 추정 (거래량 × fee%)
-        # 실제 fee는 풀 내부 계산과 살짝 다를 수 있지만 해커톤용 근사에는 충분
-        total_fees_token0 += abs(amount0) * fee
-        total_fees_token1 += abs(amount1) * fee
-
-    t0_decimals = await Web3Utils.decimals(
-        web3ctx, AsyncWeb3.to_checksum_address(model.token0_address)
-    )
-    t1_decimals = await Web3Utils.decimals(
-        web3ctx, AsyncWeb3.to_checksum_address(model.token1_address)
-    )
-    total_fees_token0 = total_fees_token0 / 10**t0_decimals
-    total_fees_token1 = total_fees_token1 / 10**t1_decimals
+    # 실제 fee는 풀 내부 계산과 살짝 다를 수 있지만 근사에는 충분
+    if decimals is None:
+        metas = await TokenRegistry().get_many(
+            web3ctx, [model.token0_address, model.token1_address]
+        )
+        decimals = (
+            metas[AsyncWeb3.to_checksum_address(model.token0_address)].decimals,
+            metas[AsyncWeb3.to_checksum_address(model.token1_address)].decimals,
+        )
+    t0_decimals, t1_decimals = decimals
+    total_fees_token0 = abs_amount0 * fee_ppm / 1_000_000 / 10**t0_decimals
+    total_fees_token1 = abs_amount1 * fee_ppm / 1_000_000 / 10**t1_decimals
 
     return {"fees_token0": total_fees_token0, "fees_token1": total_fees_token1}
 
@@ -173,55 +229,265 @@ class TvlResponse:
     t1_fees: float
 
 
+# /api/pool-infos 정렬 키 -> tvl 문서 필드
+SORT_FIELDS = {
+    "apr": "metrics.apr",
+    "tvl_usd": "metrics.tvl_usd",
+    "total_fee_usd": "metrics.total_fee_usd",
+    "pool_address": "pool_address",
+}
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class PoolQuery:
+    dex_type: Optional[str] = None
+    token_address: Optional[str] = None
+    min_tvl_usd: Optional[float] = None
+    min_apr: Optional[float] = None
+    sort: str = "apr"
+    descending: bool = True
+    limit: int = 100
+    cursor: Optional[str] = None
+
+
+def encode_cursor(value: Any, pool_address: str) -> str:
+    raw = json.dumps([value, pool_address]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, pool_address = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, pool_address
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _doc_to_response(doc: Dict[str, Any]) -> TvlResponse:
+    t0 = doc["tvl"]["token0"]
+    t1 = doc["tvl"]["token1"]
+    fees = doc.get("fees", {})
+    return TvlResponse(
+        pool_address=doc["pool_address"],
+        t0_addr=t0["address"],
+        t1_addr=t1["address"],
+        t0_decimal=t0["decimals"],
+        t1_decimal=t1["decimals"],
+        t0_balance=t0["balance"],
+        t1_balance=t1["balance"],
+        t0_symbol=t0["symbol"],
+        t1_symbol=t1["symbol"],
+        t0_fees=fees.get("fees_token0", 0),
+        t1_fees=fees.get("fees_token1", 0),
+    )
+
+
+def _split_joined(
+    docs: List[Dict[str, Any]],
+) -> Tuple[list[TvlResponse], Dict[str, PoolInfoModel]]:
+    responses = [_doc_to_response(doc) for doc in docs]
+    pool_info_map = {
+        doc["pool_address"]: PoolInfoModel(**doc["pool_info"]) for doc in docs
+    }
+    return responses, pool_info_map
+
+
 @singleton
 class TvlService:
     def __init__(self):
         db = get_mongo()
         self.pool_col = db["tvl"]
 
+    async def ensure_indexes(self):
+        await self.pool_col.create_index([("pool_address", ASCENDING)])
+        await self.pool_col.create_index([("tvl.token0.address", ASCENDING)])
+        await self.pool_col.create_index([("tvl.token1.address", ASCENDING)])
+        for field in ("metrics.apr", "metrics.tvl_usd", "metrics.total_fee_usd"):
+            await self.pool_col.create_index(
+                [(field, DESCENDING), ("pool_address", ASCENDING)]
+            )
+            await self.pool_col.create_index(
+                [("dex_type", ASCENDING), (field, DESCENDING), ("pool_address", ASCENDING)]
+            )
+
+    async def _aggregate_joined(
+        self, stages: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        pipeline = self._joined_pipeline(stages)
+        return await self.pool_col.aggregate(pipeline).to_list(length=None)
+
+    def _joined_pipeline(self, stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        tvl 문서에 pool_infos 를 $lookup 으로 붙여 한 번의 왕복으로 조회.
+        - stages: $lookup 앞에 붙는 $match/$sort/$limit (lookup 대상 수를 먼저 줄인다)
+        - pool_info 가 없는 풀, v2 풀은 서버에서 제외
+        - pool_infos 에 같은 주소가 중복 저장된 경우 마지막 문서를 사용 (기존 dict join 과 동일)
+        """
+        pipeline = [
+            *stages,
+            {
+                "$project": {
+                    "_id": 0,
+                    "pool_address": 1,
+                    "tvl": 1,
+                    "fees": 1,
+                    "metrics": 1,
+                }
+            },
+            {
+                "$lookup": {
+                    "from": "pool_infos",
+                    "localField": "pool_address",
+                    "foreignField": "pool_address",
+                    "as": "pool_info",
+                }
+            },
+            {"$addFields": {"pool_info": {"$arrayElemAt": ["$pool_info", -1]}}},
+            {
+                "$match": {
+                    "pool_info": {"$exists": True},
+                    "pool_info.version": {"$not": {"$regex": "v2"}},
+                }
+            },
+            {"$project": {"pool_info._id": 0}},
+        ]
+        return pipeline
+
+    async def get_all_joined(
+        self,
+    ) -> Tuple[list[TvlResponse], Dict[str, PoolInfoModel]]:
+        docs = await self._aggregate_joined([])
+        return _split_joined(docs)
+
+    async def get_token_addresses(self) -> set[str]:
+        token0, token1 = await asyncio.gather(
+            self.pool_col.distinct("tvl.token0.address"),
+            self.pool_col.distinct("tvl.token1.address"),
+        )
+        return set(token0) | set(token1)
+
+    async def iter_joined(
+        self, batch_size: int = 200
+    ) -> AsyncIterator[Tuple[list[TvlResponse], Dict[str, PoolInfoModel]]]:
+        """
+        get_all_joined 와 같은 결과를 커서를 소비하는 대로 batch_size 단위로 흘려보낸다.
+        """
+        cursor = self.pool_col.aggregate(
+            self._joined_pipeline([]), batchSize=batch_size
+        )
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield _split_joined(batch)
+                batch = []
+        if batch:
+            yield _split_joined(batch)
+
+    async def get_joined_by_addresses(
+        self, pool_addresses: List[str]
+    ) -> Tuple[list[TvlResponse], Dict[str, PoolInfoModel]]:
+        checksummed = [AsyncWeb3.to_checksum_address(a) for a in pool_addresses]
+        docs = await self._aggregate_joined(
+            [{"$match": {"pool_address": {"$in": checksummed}}}]
+        )
+        return _split_joined(docs)
+
+    async def find_page(
+        self, query: PoolQuery
+    ) -> Tuple[list[TvlResponse], Dict[str, PoolInfoModel], Optional[str]]:
+        """
+        PoolQuery 를 tvl 컬렉션 쿼리(필터 + 정렬 + keyset 커서)로 변환해 한 페이지만 조회.
+        dex_type/version/metrics 는 save_metrics 로 비정규화된 필드라 인덱스를 타고,
+        pool_infos join 은 잘라낸 페이지에 대해서만 수행된다.
+        """
+        field = SORT_FIELDS.get(query.sort)
+        if field is None:
+            raise ValueError(
+                f"Unknown sort key: {query.sort}. Available: {', '.join(SORT_FIELDS)}"
+            )
+        limit = max(1, min(query.limit, MAX_PAGE_SIZE))
+
+        conditions: List[Dict[str, Any]] = [
+            # metrics 가 저장된(= pool_info 가 있고 v2 가 아닌) 풀만 대상
+            {"dex_type": {"$exists": True}},
+            {"version": {"$not": {"$regex": "v2"}}},
+        ]
+        if query.dex_type:
+            conditions.append({"dex_type": query.dex_type.lower()})
+        if query.token_address:
+            token = AsyncWeb3.to_checksum_address(query.token_address)
+            conditions.append(
+                {"$or": [{"tvl.token0.address": token}, {"tvl.token1.address": token}]}
+            )
+        if query.min_tvl_usd is not None:
+            conditions.append({"metrics.tvl_usd": {"$gte": query.min_tvl_usd}})
+        if query.min_apr is not None:
+            conditions.append({"metrics.apr": {"$gte": query.min_apr}})
+
+        op = "$lt" if query.descending else "$gt"
+        if query.cursor:
+            value, last_address = decode_cursor(query.cursor)
+            if field == "pool_address":
+                conditions.append({"pool_address": {op: last_address}})
+            else:
+                conditions.append(
+                    {
+                        "$or": [
+                            {field: {op: value}},
+                            {field: value, "pool_address": {"$gt": last_address}},
+                        ]
+                    }
+                )
+
+        direction = DESCENDING if query.descending else ASCENDING
+        sort = [(field, direction)]
+        if field != "pool_address":
+            sort.append(("pool_address", ASCENDING))
+
+        docs = await self._aggregate_joined(
+            [
+                {"$match": {"$and": conditions}},
+                {"$sort": dict(sort)},
+                {"$limit": limit + 1},
+            ]
+        )
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            value = last["pool_address"]
+            if field != "pool_address":
+                value = last.get("metrics", {}).get(field.split(".", 1)[1])
+            next_cursor = encode_cursor(value, last["pool_address"])
+
+        return (*_split_joined(docs), next_cursor)
+
+    async def save_metrics(self, metrics: Dict[str, Dict[str, Any]]):
+        """
+        pool_address -> 저장할 필드. find_page 의 필터/정렬 대상 필드를 갱신한다.
+        """
+        if not metrics:
+            return
+        ops = [
+            UpdateOne({"pool_address": pool_address}, {"$set": fields})
+            for pool_address, fields in metrics.items()
+        ]
+        await self.pool_col.bulk_write(ops, ordered=False)
+
     async def get_by_pool_address(self, pool_address: str) -> TvlResponse | None:
         doc = await self.pool_col.find_one({"pool_address": pool_address})
         if doc:
-            t0 = doc["tvl"]["token0"]
-            t1 = doc["tvl"]["token1"]
-            fees = doc.get("fees", {})
-            return TvlResponse(
-                pool_address=pool_address,
-                t0_addr=t0["address"],
-                t1_addr=t1["address"],
-                t0_decimal=t0["decimals"],
-                t1_decimal=t1["decimals"],
-                t0_balance=t0["balance"],
-                t1_balance=t1["balance"],
-                t0_symbol=t0["symbol"],
-                t1_symbol=t1["symbol"],
-                t0_fees=fees.get("fees_token0", 0),
-                t1_fees=fees.get("fees_token1", 0),
-            )
+            return _doc_to_response(doc)
         return None
 
     async def get_all_tvls(self) -> list[TvlResponse]:
         cursor = self.pool_col.find({})
         results = []
         async for doc in cursor:
-            t0 = doc["tvl"]["token0"]
-            t1 = doc["tvl"]["token1"]
-            fees = doc.get("fees", {})
-            results.append(
-                TvlResponse(
-                    pool_address=doc["pool_address"],
-                    t0_addr=t0["address"],
-                    t1_addr=t1["address"],
-                    t0_decimal=t0["decimals"],
-                    t1_decimal=t1["decimals"],
-                    t0_balance=t0["balance"],
-                    t1_balance=t1["balance"],
-                    t0_symbol=t0["symbol"],
-                    t1_symbol=t1["symbol"],
-                    t0_fees=fees.get("fees_token0", 0),
-                    t1_fees=fees.get("fees_token1", 0),
-                )
-            )
+            results.append(_doc_to_response(doc))
         return results
 
 
@@ -229,61 +495,8 @@ class TvlService:
 # 실행
 # ------------------------
 if __name__ == "__main__":
+    import sys
+    from services.index.indexer import main
 
-    async def main():
-        async def fetch_tvl(web3ctx: Web3Ctx, model: PoolInfoModel, deduplicate=True):
-            try:
-                tvl_col = get_mongo()["tvl"]
-                if deduplicate:
-                    response = await service.get_by_pool_address(model.pool_address)
-                    if response:
-                        logger.debug(
-                            f"[tvl] skipping existing {model.pool_address} at {time.time()}"
-                        )
-                        return
-                tvl = await get_tvl(web3ctx, model)
-                fees = await get_fees_last_hour(web3ctx, model)
-                await tvl_col.update_one(
-                    {"pool_address": model.pool_address},  # filter
-                    {
-                        "$set": {
-                            "timestamp": int(time.time()),
-                            "tvl": tvl,
-                            "fees": fees,
-                        }
-                    },
-                    upsert=True,
-                )
-
-            except Exception as e:
-                logger.exception(f"Error processing pool {model.pool_address}: {e}")
-
-        from hypurrquant.evm import use_chain, Chain
-        from services.pools import HybraPoolInfoFetcher
-
-        init_db()
-        hybra_fetcher = HybraPoolInfoFetcher()
-        service = TvlService()
-        pools = await hybra_fetcher.get_all()
-        filtered = list(filter(lambda p: p.fee != None, pools))
-        try:
-            cap = 20
-            async with use_chain(Chain.HYPERLIQUID) as web3ctx:
-                for filters in range(0, len(filtered), cap):
-                    batch = filtered[filters : filters + cap]
-                    logger.debug(f"{batch=}")
-                    print(
-                        f"[tvl] processing batch {filters // cap + 1} "
-                        f"({len(batch)} pools) at {time.time()}"
-                    )
-                    tasks = [fetch_tvl(web3ctx, p) for p in batch]
-                    await asyncio.gather(*tasks)
-        except Exception as e:
-            return 1
-
-        finally:
-            await close_db()
-
-    import asyncio
-
-    asyncio.run(main())
+    # FETCH_INTERVAL > 0 이면 데몬 모드 (services.index.indexer 참고)
+    sys.exit(asyncio.run(main()))
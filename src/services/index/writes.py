@@ -0,0 +1,179 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+from hypurrquant.logging_config import configure_logging
+from .tvl import TVL_UPDATED_CHANNEL
+import asyncio
+import math
+import os
+import time
+
+logger = configure_logging(__name__)
+
+# bulk_write 한 번에 보내는 upsert 수 / 최대 대기 시간(초)
+TVL_WRITE_BATCH_SIZE = int(os.getenv("TVL_WRITE_BATCH_SIZE", "200"))
+TVL_WRITE_FLUSH_SEC = float(os.getenv("TVL_WRITE_FLUSH_SEC", "2"))
+# 기존 값과 상대 오차가 이 이하이면 변경 없음으로 보고 쓰지 않음
+TVL_CHANGE_TOLERANCE = float(os.getenv("TVL_CHANGE_TOLERANCE", "1e-6"))
+
+
+def values_close(old: Any, new: Any, rel_tol: float) -> bool:
+    """
+    dict/list 는 재귀적으로, 숫자는 상대 오차로, 나머지는 == 로 비교.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        return old.keys() == new.keys() and all(
+            values_close(old[k], new[k], rel_tol) for k in new
+        )
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+        return len(old) == len(new) and all(
+            values_close(o, n, rel_tol) for o, n in zip(old, new)
+        )
+    if isinstance(old, bool) or isinstance(new, bool):
+        return old == new
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return math.isclose(old, new, rel_tol=rel_tol, abs_tol=0.0)
+    return old == new
+
+
+class BulkTvlWriter:
+    """
+    tvl 문서 upsert 를 모아 unordered bulk_write 로 보낸다.
+    - batch_size 개가 모이거나 flush_interval 초가 지나면 flush
+    - load_existing() 으로 읽어 둔 기존 값과 tolerance 이내로 같으면 쓰기를 생략
+    flush 된 풀 주소만 TVL_UPDATED_CHANNEL 로 발행한다 (변경 없는 풀은 구독자에게 알릴 필요 없음).
+    on_flush 가 있으면 flush 마다 반영이 끝난 풀(쓴 풀 + 생략한 풀) 주소로 호출한다 (실행 체크포인트용).
+    bulk_write 가 실패하면 해당 upsert 를 다시 대기열에 넣어 다음 flush 에서 재시도하고,
+    close() 의 마지막 flush 까지 실패하면 예외를 올려 사이클 실패로 드러낸다.
+    """
+
+    def __init__(
+        self,
+        col,
+        redis,
+        batch_size: int = TVL_WRITE_BATCH_SIZE,
+        flush_interval: float = TVL_WRITE_FLUSH_SEC,
+        tolerance: float = TVL_CHANGE_TOLERANCE,
+        on_flush: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+    ):
+        self.col = col
+        self.redis = redis
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.tolerance = tolerance
+        self._existing: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, UpdateOne] = {}
+        # 변경 없음으로 생략되어 다음 flush 때 on_flush 로 알릴 풀
+        self._unchanged: List[str] = []
+        self.on_flush = on_flush
+        self._flush_lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self.written = 0
+        self.skipped = 0
+        self.flushes = 0
+
+    async def load_existing(self, pool_addresses: Iterable[str]):
+        """
+        기존 tvl/fees 값을 한 번의 조회로 읽어 둔다.
+        """
+        cursor = self.col.find(
+            {"pool_address": {"$in": list(pool_addresses)}},
+            projection={"_id": 0, "pool_address": 1, "tvl": 1, "fees": 1},
+        )
+        self._existing = {doc["pool_address"]: doc async for doc in cursor}
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run_timer())
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self.flush()
+
+    async def put(
+        self,
+        pool_address: str,
+        tvl: Dict[str, Any],
+        fees: Dict[str, Any],
+        block_number: int | None = None,
+    ) -> bool:
+        """
+        block_number: 값을 읽은 (사이클 고정) 블록. 문서에 함께 기록한다.
+        반환: 쓰기 대상이면 True, 기존 값과 같아 생략했으면 False
+        """
+        old = self._existing.get(pool_address)
+        if (
+            old is not None
+            and values_close(old.get("tvl"), tvl, self.tolerance)
+            and values_close(old.get("fees"), fees, self.tolerance)
+        ):
+            self.skipped += 1
+            self._unchanged.append(pool_address)
+            return False
+
+        self._existing[pool_address] = {"tvl": tvl, "fees": fees}
+        self._pending[pool_address] = UpdateOne(
+            {"pool_address": pool_address},  # filter
+            {
+                "$set": {
+                    "timestamp": int(time.time()),
+                    "block_number": block_number,
+                    "tvl": tvl,
+                    "fees": fees,
+                }
+            },
+            upsert=True,
+        )
+        if len(self._pending) >= self.batch_size:
+            try:
+                await self.flush()
+            except Exception as e:
+                # 이 풀의 upsert 는 대기열에 남아 있으므로 풀 처리 자체는 실패가 아니다
+                logger.exception(f"[tvl] bulk write failed, will retry: {e}")
+        return True
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending and not self._unchanged:
+                return
+            pending, self._pending = self._pending, {}
+            unchanged, self._unchanged = self._unchanged, []
+            ops: List[UpdateOne] = list(pending.values())
+            if ops:
+                try:
+                    await self.col.bulk_write(ops, ordered=False)
+                except Exception:
+                    # 다음 flush 에서 재시도 (그 사이 같은 풀에 새로 들어온 값이 있으면 그쪽 우선)
+                    self._pending = {**pending, **self._pending}
+                    self._unchanged = unchanged + self._unchanged
+                    raise
+                self.written += len(ops)
+                self.flushes += 1
+
+            if self.on_flush is not None:
+                await self.on_flush(list(pending) + unchanged)
+            if not pending:
+                return
+
+            # API 워커의 실시간 구독자에게 변경 알림
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for addr in pending:
+                    pipe.publish(TVL_UPDATED_CHANNEL, addr)
+                await pipe.execute()
+
+    async def _run_timer(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"[tvl] periodic bulk write failed: {e}")
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "written": self.written,
+            "skipped": self.skipped,
+            "flushes": self.flushes,
+        }
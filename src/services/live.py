@@ -0,0 +1,202 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import os
+
+from fastapi.encoders import jsonable_encoder
+from hypurrquant.utils.singleton import singleton
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.redis import get_redis_async
+
+from .service import Service
+from .index.tvl import TVL_UPDATED_CHANNEL
+
+_logger = configure_logging(__name__)
+
+# 인덱서 알림을 모아서 한 번에 재조립하는 간격(초)
+LIVE_DEBOUNCE_SEC = float(os.getenv("POOL_LIVE_DEBOUNCE_SEC", "2"))
+SUBSCRIBER_QUEUE_SIZE = 1000
+# Redis 구독이 끊겼을 때 재연결 대기(초): 1초부터 두 배씩, 최대 이 값
+LIVE_RECONNECT_MAX_SEC = float(os.getenv("POOL_LIVE_RECONNECT_MAX_SEC", "30"))
+
+# 변경 여부 판단에 사용하는 필드 (pool_info._id 등 매번 바뀌는 값은 제외)
+_FINGERPRINT_FIELDS = ("tvl_usd", "total_fee_usd", "apr", "t0_price", "t1_price")
+
+
+def _fingerprint(info: Dict[str, Any]) -> tuple:
+    tvl = info.get("tvl_response", {})
+    return tuple(info.get(k) for k in _FINGERPRINT_FIELDS) + tuple(
+        sorted((k, v) for k, v in tvl.items() if not isinstance(v, (dict, list)))
+    )
+
+
+def _pool_address(info: Dict[str, Any]) -> str:
+    return info["tvl_response"]["pool_address"]
+
+
+@dataclass(eq=False)
+class Subscription:
+    dex_type: Optional[str] = None
+    token_address: Optional[str] = None
+    queue: asyncio.Queue = field(
+        default_factory=lambda: asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    )
+
+    def matches(self, info: Dict[str, Any]) -> bool:
+        if self.dex_type and info["pool_info"].get("dex_type") != self.dex_type.lower():
+            return False
+        if self.token_address:
+            tvl = info["tvl_response"]
+            token = self.token_address.lower()
+            if token not in (tvl["t0_addr"].lower(), tvl["t1_addr"].lower()):
+                return False
+        return True
+
+    def put(self, event: str, payload: Any):
+        # 느린 클라이언트 때문에 메모리가 쌓이지 않도록 가장 오래된 이벤트를 버린다
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait((event, payload))
+
+
+@singleton
+class PoolUpdateBroadcaster:
+    """
+    풀 단위 변경분(delta)을 구독자에게 push.
+    - 스냅샷이 교체될 때마다 publish() 로 전체를 비교 (가격 변화 반영)
+    - 인덱서가 TVL_UPDATED_CHANNEL 로 알린 풀은 단건 경로(get_pools)로 즉시 재조립
+    이벤트 payload 는 변경된 풀의 전체 InfoResponse (pool_removed 는 pool_address 만).
+    """
+
+    def __init__(self):
+        self.redis = get_redis_async()
+        self.service = Service()
+        self._subscribers: Set[Subscription] = set()
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, tuple] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+        self._reconnect_delay = 1.0
+
+    # ============ 구독 ============
+    def subscribe(
+        self, dex_type: Optional[str] = None, token_address: Optional[str] = None
+    ) -> Subscription:
+        sub = Subscription(dex_type=dex_type, token_address=token_address)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subscribers.discard(sub)
+
+    def current(self, sub: Subscription) -> List[Dict[str, Any]]:
+        return [info for info in self._last.values() if sub.matches(info)]
+
+    # ============ 발행 ============
+    def publish(self, infos: Iterable[Dict[str, Any]], complete: bool = False):
+        """
+        infos: jsonable_encoder 를 거친 InfoResponse 목록.
+        complete=True 이면 전체 목록으로 보고 빠진 풀을 pool_removed 로 알린다.
+        """
+        seen: Set[str] = set()
+        changed: List[Dict[str, Any]] = []
+        for info in infos:
+            addr = _pool_address(info)
+            seen.add(addr)
+            fp = _fingerprint(info)
+            if self._fingerprints.get(addr) != fp:
+                self._fingerprints[addr] = fp
+                changed.append(info)
+            self._last[addr] = info
+
+        removed: List[Dict[str, Any]] = []
+        if complete:
+            for addr in set(self._last) - seen:
+                removed.append(self._last.pop(addr))
+                self._fingerprints.pop(addr, None)
+
+        if not self._subscribers or not (changed or removed):
+            return
+        for sub in list(self._subscribers):
+            for info in changed:
+                if sub.matches(info):
+                    sub.put("pool", info)
+            for info in removed:
+                if sub.matches(info):
+                    sub.put("pool_removed", {"pool_address": _pool_address(info)})
+
+    # ============ 인덱서 알림 수신 ============
+    async def _listen(self):
+        """
+        Redis 오류로 구독이 끊기면 backoff 후 다시 구독한다 (리스너가 조용히 죽지 않도록).
+        끊긴 동안의 변경은 스냅샷 diff 로 전달된다.
+        """
+        while True:
+            try:
+                await self._consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _logger.exception(
+                    f"⚠️ live listener lost redis subscription, "
+                    f"retrying in {self._reconnect_delay:.0f}s: {e}"
+                )
+            await asyncio.sleep(self._reconnect_delay)
+            self._reconnect_delay = min(
+                self._reconnect_delay * 2, LIVE_RECONNECT_MAX_SEC
+            )
+
+    async def _consume(self):
+        pubsub = self.redis.pubsub()
+        loop = asyncio.get_running_loop()
+        try:
+            await pubsub.subscribe(TVL_UPDATED_CHANNEL)
+            # 구독에 성공하면 backoff 초기화
+            self._reconnect_delay = 1.0
+            pending: Set[str] = set()
+            first_at = 0.0
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=LIVE_DEBOUNCE_SEC
+                )
+                if message is not None:
+                    data = message["data"]
+                    if not pending:
+                        first_at = loop.time()
+                    pending.add(data.decode() if isinstance(data, bytes) else data)
+                    if loop.time() - first_at < LIVE_DEBOUNCE_SEC:
+                        continue
+                if not pending:
+                    continue
+
+                # debounce 구간 동안 모인 풀만 단건 경로로 재조립
+                batch, pending = list(pending), set()
+                try:
+                    infos = await self.service.get_pools(batch)
+                    self.publish(jsonable_encoder(infos))
+                except Exception as e:
+                    _logger.info(f"⚠️ live update failed for {batch}: {e}", exc_info=True)
+        finally:
+            try:
+                await pubsub.unsubscribe(TVL_UPDATED_CHANNEL)
+                await pubsub.close()
+            except Exception:
+                # 끊긴 연결이면 정리도 실패할 수 있다
+                pass
+
+    def start(self):
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        task = self._listener_task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._listener_task = None
+
@@ -9,6 +9,7 @@ from .kitten import KittenPoolInfoFetcher
 from models.pool_info import PoolInfoModel
 from hypurrquant.db.mongo import get_mongo
 from typing import Dict
+from pymongo import ASCENDING
 from web3 import AsyncWeb3
 
 __all__ = [
@@ -23,6 +24,10 @@ class PoolInfoService:
     def __init__(self):
         self.col = get_mongo()["pool_infos"]
 
+    async def ensure_indexes(self):
+        await self.col.create_index([("pool_address", ASCENDING)])
+        await self.col.create_index([("dex_type", ASCENDING)])
+
     async def get_by_addresses(
         self, pool_addresses: list[str]
     ) -> Dict[str, PoolInfoModel]:
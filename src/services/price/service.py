@@ -5,9 +5,11 @@ import asyncio
 
 from hypurrquant.utils.singleton import singleton
 from hypurrquant.logging_config import configure_logging, coroutine_logging
-from hypurrquant.evm import Web3Ctx, Chain, Web3Utils
+from hypurrquant.evm import Web3Ctx, Chain
 from hypurrquant.db.redis import get_redis_async
 from hypurrquant.api.async_http import send_request_for_external
+from utils.singleflight import SingleFlight
+from ..tokens import TokenRegistry
 
 from web3 import AsyncWeb3
 
@@ -51,6 +53,7 @@ def _parse_float(x: Any) -> Optional[float]:
 class TokenPriceService:
     def __init__(self):
         self.redis_client = get_redis_async()
+        self._price_flight = SingleFlight("price.get_token_price_in_usd")
 
     # ============ 캐시 유틸 ============
     def _ds_pairs_cache_key(self, chain: Chain, addr: str) -> str:
@@ -177,65 +180,17 @@ class TokenPriceService:
         """
         return values
 
-    # ============ 심볼 조회 (기존 멀티콜 캐시 재활용) ============
+    # ============ 심볼 조회 (토큰 레지스트리) ============
     async def _get_tickers(self, web3ctx: Web3Ctx, addrs: List[str]) -> Dict[str, str]:
         try:
             return await self.get_ticker_by_addresses(web3ctx, *addrs)
         except Exception:
             return {a: a[:6] for a in addrs}
 
-    async def get_ticker_by_addresses(self, web3ctx: Web3Ctx, *tokens, batch_size=500):
-        tokens = [AsyncWeb3.to_checksum_address(t) for t in tokens]
-        keys = [
-            f"hypurrquant:common:{web3ctx.chain_id}:tickerByAddress:{t}" for t in tokens
-        ]
-        cached = await self.redis_client.mget(keys)
-
-        results: Dict[str, str] = {}
-        no_cache: List[str] = []
-        for addr, symbol in zip(tokens, cached):
-            if symbol:
-                results[addr] = symbol
-            else:
-                no_cache.append(addr)
-
-        if no_cache:
-            from web3.contract import AsyncContract
-            from eth_abi import decode
-
-            multicall: AsyncContract = await Web3Utils.get_multicall(web3ctx)
-            fetched: Dict[str, str] = {}
-            for i in range(0, len(no_cache), batch_size):
-                chunk = no_cache[i : i + batch_size]
-                calls, meta = [], []
-                for addr in chunk:
-                    a = AsyncWeb3.to_checksum_address(addr)
-                    calls.append(
-                        {"target": a, "callData": Web3Utils.encode_selector("symbol()")}
-                    )
-                    meta.append(a)
-                res = await multicall.functions.tryAggregate(False, calls).call()
-                for a, (success, ret) in zip(meta, res):
-                    if not success or not ret:
-                        continue
-                    try:
-                        symbol = decode(["string"], ret)[0]
-                    except Exception:
-                        try:
-                            symbol = ret.decode("utf-8").rstrip("\x00")
-                        except Exception:
-                            continue
-                    fetched[a] = symbol
-
-            results.update(fetched)
-            if fetched:
-                await self.redis_client.mset(
-                    {
-                        f"hypurrquant:common:{web3ctx.chain_id}:tickerByAddress:{k}": v
-                        for k, v in fetched.items()
-                    }
-                )
-        return results
+    async def get_ticker_by_addresses(self, web3ctx: Web3Ctx, *tokens):
+        # symbol 은 불변이므로 공용 토큰 레지스트리(Mongo + 프로세스 캐시)에서 읽는다
+        metas = await TokenRegistry().get_many(web3ctx, tokens)
+        return {addr: meta.symbol for addr, meta in metas.items()}
 
     # ============ 메인: 가격 조회 ============
     @coroutine_logging
@@ -250,7 +205,26 @@ class TokenPriceService:
         - 1차: A를 조회해 baseToken==A 인 페어들의 priceUsd 산술평균
         - 2차: (1차 실패 시) USDT0를 조회해 quoteToken==A 인 페어들의 (1/priceNative) 산술평균
         - 둘 다 없으면 None
+        - 같은 주소 집합에 대한 동시 호출은 하나의 조회로 합쳐진다
         """
+        key = (
+            web3ctx.chain_id,
+            frozenset(a.lower() for a in token_addresses),
+            outlier_strategy,
+        )
+        return await self._price_flight.do(
+            key,
+            lambda: self._get_token_price_in_usd(
+                web3ctx, token_addresses, outlier_strategy
+            ),
+        )
+
+    async def _get_token_price_in_usd(
+        self,
+        web3ctx: Web3Ctx,
+        token_addresses: List[str],
+        outlier_strategy: Optional[str] = None,
+    ) -> Dict[str, ResultType]:
         chain = web3ctx.chain
         slug = CHAIN_TO_DS_SLUG.get(chain)
         if not slug:
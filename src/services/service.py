@@ -1,19 +1,29 @@
 from dataclasses import dataclass
 
-from typing import Dict
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
 from hypurrquant.evm import use_chain, Chain, Web3Ctx
 from hypurrquant.utils.singleton import singleton
 from hypurrquant.logging_config import configure_logging
 from hypurrquant.db.redis import get_redis_async
 
-from .index.tvl import TvlService, TvlResponse
+from .index.tvl import POOL_READS_KEY, TvlService, TvlResponse, PoolQuery
 from .pools import PoolInfoService
 from models.pool_info import PoolInfoModel
 from .price import TokenPriceService, ResultType
+from .assembly import build_columns, compute_metrics
+from utils.singleflight import SingleFlight
+from utils.stages import Stage, run_stages
+from utils.rpc_pool import use_rpc_pool
 from dataclasses import dataclass
 
 _logger = configure_logging(__name__)
 
+# stage 별 deadline(초). 넘기면 rows 는 마지막으로 조립한 행, 가격은 마지막으로 알려진 가격(stale)으로 대체
+ROWS_DEADLINE_SEC = float(os.getenv("POOL_ROWS_DEADLINE_SEC", "10"))
+PRICE_DEADLINE_SEC = float(os.getenv("POOL_PRICE_DEADLINE_SEC", "3"))
+
 
 @dataclass
 class InfoResponse:
@@ -25,6 +35,8 @@ class InfoResponse:
     apr: float
     t0_price: float
     t1_price: float
+    # 가격 조회가 deadline 을 넘겨 마지막으로 알려진 가격을 썼거나, 가격을 아예 얻지 못해 0 으로 계산한 경우 True
+    price_stale: bool = False
 
 
 @singleton
@@ -34,72 +46,272 @@ class Service:
         self.tvl_service = TvlService()
         self.pool_info_service = PoolInfoService()
         self.token_price_service = TokenPriceService()
+        self._all_pools_flight = SingleFlight("service.get_all_pools")
+        self._last_prices: Dict[str, ResultType] = {}
+        # 마지막으로 성공한 rows stage 결과 (response, pool_info_map)
+        self._last_rows: Optional[Tuple[Any, Any]] = None
+        # 진행 중인 rows 조회. deadline 을 넘긴 조회가 끝나기 전에는 새 join 을 띄우지 않고 재사용
+        self._rows_task: Optional[asyncio.Task] = None
 
-    # TODO cache 추가하기
     async def get_all_pools(self) -> list[InfoResponse]:
-        # 1. tvl, 1h fee 정보 가져오기
-        response: list[TvlResponse] = await self.tvl_service.get_all_tvls()
+        infos, _ = await self.build_all_pools()
+        return infos
 
-        _logger.info(f"Fetched {len(response)} TVL responses")
-        pool_addresses = [r.pool_address for r in response]
+    async def build_all_pools(self) -> Tuple[list[InfoResponse], Set[str]]:
+        """
+        반환: (조립된 풀, fallback 으로 대체된 stage 이름). 동시에 들어온 요청은 하나의 조립 결과를 공유한다.
+        """
+        return await self._all_pools_flight.do("all", self._get_all_pools)
 
-        # 2. 조회된 풀의 메타 정보 가져오기
-        pool_info_map: Dict[str, PoolInfoModel] = (
-            await self.pool_info_service.get_by_addresses(pool_addresses)
+    async def _get_all_pools(self) -> Tuple[list[InfoResponse], Set[str]]:
+        # tvl+pool_info 조회와 가격 조회는 서로 의존하지 않으므로 동시에 실행
+        #   rows   : tvl + pool 메타 정보 aggregation (pool_info 없는 풀, v2 풀 제외).
+        #            deadline 을 넘기면 마지막으로 조립한 행으로 대체
+        #   tokens : tvl 에 등장하는 토큰 주소 (distinct)
+        #   prices : tokens 의 USD 가격. deadline 을 넘기면 마지막 가격으로 대체
+        results, degraded = await run_stages(
+            {
+                "rows": self._rows_stage(),
+                "tokens": Stage(fn=self.tvl_service.get_token_addresses),
+                "prices": self._price_stage("tokens"),
+            }
+        )
+        response, pool_info_map = results["rows"]
+        token_price_map, stale_tokens = self._with_last_prices(
+            results["tokens"], results["prices"]
+        )
+        _logger.info(
+            f"Fetched {len(response)} joined TVL/pool info rows, "
+            f"price info for {len(token_price_map)} tokens "
+            f"({len(stale_tokens)} stale, degraded={sorted(degraded)})"
         )
-        _logger.info(f"Fetched {len(pool_info_map)} pool info entries")
 
-        # 3. 모든 address의 가격 정보 조회하기
+        info_responses = self._assemble(
+            response, pool_info_map, token_price_map, stale_tokens
+        )
+        _logger.info(f"Fetched {len(info_responses)} pool info responses")
+        return info_responses, degraded
+
+    async def query_pools(
+        self, query: PoolQuery
+    ) -> Tuple[list[InfoResponse], Optional[str]]:
+        """
+        필터/정렬/페이지네이션을 tvl 컬렉션 쿼리로 내려서 요청된 페이지만 조립한다.
+        정렬/최소값 기준은 마지막 스냅샷 시점에 저장된 metrics 값이다.
+        """
+        response, pool_info_map, next_cursor = await self.tvl_service.find_page(query)
+        if not response:
+            return [], None
+
+        token_price_map, stale_tokens = await self._get_price_map(response)
+        return (
+            self._assemble(response, pool_info_map, token_price_map, stale_tokens),
+            next_cursor,
+        )
+
+    async def get_pools(self, pool_addresses: list[str]) -> list[InfoResponse]:
+        """
+        주소로 지정된 풀만 조립 (tvl 문서 + pool_info join, 해당 토큰 가격만 조회).
+        전체 풀 개수와 무관하게 요청한 풀 수에만 비례한다.
+        """
+        response, pool_info_map = await self.tvl_service.get_joined_by_addresses(
+            pool_addresses
+        )
+        if not response:
+            return []
+        token_price_map, stale_tokens = await self._get_price_map(response)
+        return self._assemble(response, pool_info_map, token_price_map, stale_tokens)
+
+    async def record_pool_reads(self, pool_addresses: Iterable[str]):
+        """
+        풀 단건/배치 조회 수를 Redis 에 누적 (인덱서가 갱신 우선순위 계산에 사용).
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for addr in pool_addresses:
+                    pipe.hincrby(POOL_READS_KEY, addr.lower(), 1)
+                await pipe.execute()
+        except Exception as e:
+            _logger.info(f"⚠️ failed to record pool reads: {e}")
+
+    async def stream_pools(self, batch_size: int = 200) -> AsyncIterator[InfoResponse]:
+        """
+        tvl 커서를 batch_size 단위로 소비하면서 조립된 풀을 바로 흘려보낸다.
+        다음 배치의 가격 조회는 현재 배치를 내보내는 동안 미리 시작한다.
+        """
+        pending: Optional[Tuple[list, Dict[str, PoolInfoModel], asyncio.Task]] = None
+        try:
+            async for response, pool_info_map in self.tvl_service.iter_joined(
+                batch_size
+            ):
+                # 새 task 를 먼저 pending 에 넣어 두어야 이전 배치를 내보내는 중 끊겨도 finally 에서 정리된다
+                previous, pending = pending, (
+                    response,
+                    pool_info_map,
+                    asyncio.create_task(self._get_price_map(response)),
+                )
+                if previous is not None:
+                    for info in await self._assemble_pending(previous):
+                        yield info
+
+            if pending is not None:
+                for info in await self._assemble_pending(pending):
+                    yield info
+                pending = None
+        finally:
+            # 클라이언트가 중간에 끊은 경우 미리 시작한 가격 조회 정리
+            if pending is not None and not pending[2].done():
+                pending[2].cancel()
+
+    async def _assemble_pending(
+        self, pending: Tuple[list, Dict[str, PoolInfoModel], asyncio.Task]
+    ) -> list[InfoResponse]:
+        response, pool_info_map, price_task = pending
+        token_price_map, stale_tokens = await price_task
+        return self._assemble(response, pool_info_map, token_price_map, stale_tokens)
+
+    async def save_metrics(self, info_responses: list[InfoResponse]):
+        """
+        조립된 USD 지표와 필터용 필드를 tvl 문서에 비정규화해 저장 (query_pools 에서 사용)
+        """
+        await self.tvl_service.save_metrics(
+            {
+                r.tvl_response.pool_address: {
+                    "dex_type": r.pool_info.dex_type,
+                    "version": r.pool_info.version,
+                    "metrics": {
+                        "tvl_usd": r.tvl_usd,
+                        "total_fee_usd": r.total_fee_usd,
+                        "apr": r.apr,
+                    },
+                }
+                for r in info_responses
+            }
+        )
+
+    async def _get_price_map(
+        self, response: list[TvlResponse]
+    ) -> Tuple[Dict[str, ResultType], Set[str]]:
         token_addresses = set()
         for r in response:
             token_addresses.add(r.t0_addr)
             token_addresses.add(r.t1_addr)
+
+        async def tokens():
+            return token_addresses
+
+        results, _ = await run_stages(
+            {"tokens": Stage(fn=tokens), "prices": self._price_stage("tokens")}
+        )
+        return self._with_last_prices(token_addresses, results["prices"])
+
+    def _rows_stage(self) -> Stage:
+        """
+        tvl + pool_info join stage. 가격 stage 와 같이 shield 된 task 로 돌려 deadline 을 넘겨도
+        끝까지 진행해 _last_rows 를 갱신하고, 이번 응답은 마지막 행(있으면)으로 진행한다.
+        """
+        return Stage(
+            fn=lambda: asyncio.shield(self._rows_in_flight()),
+            deadline=ROWS_DEADLINE_SEC,
+            fallback=self._rows_fallback,
+        )
+
+    def _rows_in_flight(self) -> asyncio.Task:
+        if self._rows_task is None or self._rows_task.done():
+            self._rows_task = asyncio.create_task(self._fetch_rows())
+            self._rows_task.add_done_callback(self._log_rows_failure)
+        return self._rows_task
+
+    @staticmethod
+    def _log_rows_failure(task: asyncio.Task):
+        # deadline 을 넘겨 아무도 기다리지 않는 조회의 예외도 여기서 회수한다
+        if not task.cancelled() and task.exception() is not None:
+            _logger.info(f"⚠️ rows fetch failed: {task.exception()!r}")
+
+    async def _fetch_rows(self):
+        rows = await self.tvl_service.get_all_joined()
+        self._last_rows = rows
+        return rows
+
+    def _rows_fallback(self):
+        if self._last_rows is None:
+            # 기동 직후처럼 대체할 행이 없으면 실패로 올린다
+            raise TimeoutError("rows stage timed out with no previous rows")
+        return self._last_rows
+
+    def _price_stage(self, tokens_stage: str) -> Stage:
+        """
+        tokens_stage 결과(토큰 주소들)의 가격을 조회하는 stage.
+        조회는 shield 된 task 로 돌기 때문에 deadline 을 넘겨도 끝까지 진행되어
+        마지막 가격(_last_prices)을 갱신하고, 이번 응답은 fallback({})으로 진행한다.
+        """
+        return Stage(
+            fn=lambda **deps: asyncio.shield(self._fetch_prices(deps[tokens_stage])),
+            deps=(tokens_stage,),
+            deadline=PRICE_DEADLINE_SEC,
+            fallback=lambda **deps: {},
+        )
+
+    async def _fetch_prices(self, token_addresses: Iterable[str]) -> Dict[str, ResultType]:
         async with use_chain(Chain.HYPERLIQUID) as web3ctx:
-            token_price_map: Dict[str, ResultType] = (
-                await self.token_price_service.get_token_price_in_usd(
-                    web3ctx, list(token_addresses)
-                )
+            use_rpc_pool(await web3ctx.get_w3())
+            price_map = await self.token_price_service.get_token_price_in_usd(
+                web3ctx, list(token_addresses)
             )
-        _logger.info(f"Fetched price info for {len(token_price_map)} tokens")
+        for addr, res in price_map.items():
+            if res.get("price_usd"):
+                self._last_prices[addr] = res
+        return price_map
 
-        # 4. 데이터 조립하기
-        info_responses: list[InfoResponse] = []
-
-        for r in response:
-            pool_info = pool_info_map.get(r.pool_address, None)
-            if not pool_info:
+    def _with_last_prices(
+        self, token_addresses: Iterable[str], price_map: Dict[str, ResultType]
+    ) -> Tuple[Dict[str, ResultType], Set[str]]:
+        """
+        가격이 없는 토큰은 마지막으로 알려진 가격으로 채우고, 채운 토큰 주소를 함께 반환.
+        마지막 가격조차 없는 토큰도 stale 로 반환한다 (가격 0 으로 계산된 값을 최신 값처럼 내보내지 않도록).
+        """
+        merged = dict(price_map)
+        stale: Set[str] = set()
+        for addr in token_addresses:
+            if (merged.get(addr) or {}).get("price_usd"):
                 continue
-            t0_price = token_price_map.get(r.t0_addr, {}).get("price_usd", 0) or 0
-            t1_price = token_price_map.get(r.t1_addr, {}).get("price_usd", 0) or 0
-
-            t0_fee_usd = r.t0_fees * t0_price
-            t1_fee_usd = r.t1_fees * t1_price
-            total_fee_usd = t0_fee_usd + t1_fee_usd
-
-            t0_balance_usd = r.t0_balance * t0_price
-            t1_balance_usd = r.t1_balance * t1_price
-            tvl_usd = t0_balance_usd + t1_balance_usd
-
-            info_responses.append(
-                InfoResponse(
-                    tvl_response=r,
-                    pool_info=pool_info,
-                    contract_link=f"https://hyperevmscan.io/address/{r.pool_address}",
-                    total_fee_usd=total_fee_usd,
-                    tvl_usd=tvl_usd,
-                    apr=total_fee_usd / tvl_usd * 24 * 365 if tvl_usd > 0 else 0,
-                    t0_price=t0_price,
-                    t1_price=t1_price,
-                )
-            )
+            last = self._last_prices.get(addr)
+            if last is not None:
+                merged[addr] = last
+            stale.add(addr)
+        return merged, stale
 
-        _logger.info(f"Fetched {len(info_responses)} pool info responses")
+    def _assemble(
+        self,
+        response: list[TvlResponse],
+        pool_info_map: Dict[str, PoolInfoModel],
+        token_price_map: Dict[str, ResultType],
+        stale_tokens: Set[str] = frozenset(),
+    ) -> list[InfoResponse]:
+        rows = [r for r in response if pool_info_map.get(r.pool_address)]
 
-        #  5. v2 제거
-        info_responses = [
-            r for r in info_responses if "v2" not in (r.pool_info.version or "")
+        # USD 환산/APR 은 컬럼 단위로 한 번에 계산하고, 응답 객체는 마지막에만 만든다
+        metrics = compute_metrics(build_columns(rows), token_price_map, stale_tokens)
+
+        return [
+            InfoResponse(
+                tvl_response=r,
+                pool_info=pool_info_map[r.pool_address],
+                contract_link=f"https://hyperevmscan.io/address/{r.pool_address}",
+                total_fee_usd=total_fee_usd,
+                tvl_usd=tvl_usd,
+                apr=apr,
+                t0_price=t0_price,
+                t1_price=t1_price,
+                price_stale=price_stale,
+            )
+            for r, total_fee_usd, tvl_usd, apr, t0_price, t1_price, price_stale in zip(
+                rows,
+                metrics.total_fee_usd.tolist(),
+                metrics.tvl_usd.tolist(),
+                metrics.apr.tolist(),
+                metrics.t0_price.tolist(),
+                metrics.t1_price.tolist(),
+                metrics.price_stale.tolist(),
+            )
         ]
-        _logger.info(
-            f"Filtered to {len(info_responses)} pool info responses after v2 removal"
-        )
-        return info_responses
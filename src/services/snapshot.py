@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional
+import asyncio
+import json
+import os
+import time
+
+from fastapi.encoders import jsonable_encoder
+from hypurrquant.utils.singleton import singleton
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.redis import get_redis_async
+
+from .service import Service
+from .live import PoolUpdateBroadcaster
+
+_logger = configure_logging(__name__)
+
+# ==========================
+# 스냅샷 설정
+# ==========================
+SNAPSHOT_REDIS_KEY = "hack:pool-infos:snapshot"
+SNAPSHOT_LOCK_KEY = "hack:pool-infos:snapshot:lock"
+# 백그라운드 갱신 주기 (이 시간이 지나면 stale 로 보고 재계산을 예약)
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("POOL_SNAPSHOT_REFRESH_INTERVAL", "30"))
+# stale 데이터를 그대로 내려줄 수 있는 최대 나이. 넘어가면 요청이 재계산을 기다림
+SNAPSHOT_MAX_STALE = float(os.getenv("POOL_SNAPSHOT_MAX_STALE", "600"))
+
+
+@dataclass
+class PoolSnapshot:
+    built_at: float
+    data: List[Any]  # jsonable_encoder 를 거친 InfoResponse 목록
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.built_at
+
+
+@singleton
+class PoolSnapshotService:
+    """
+    /api/pool-infos 응답을 미리 조립해 두는 materialized snapshot.
+    - 프로세스 내 사본 + Redis 사본(여러 워커가 공유)
+    - stale-while-revalidate: 갱신 주기가 지나면 기존 값을 내려주면서 백그라운드로 재계산
+    - SNAPSHOT_MAX_STALE 를 넘긴 경우(혹은 cold start)에만 요청이 재계산을 기다림
+    """
+
+    def __init__(self):
+        self.redis = get_redis_async()
+        self.service = Service()
+        self.broadcaster = PoolUpdateBroadcaster()
+        self._local: Optional[PoolSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    # ============ 읽기 ============
+    async def get(self) -> List[Any]:
+        snap = self._local
+        if snap is None or snap.age > SNAPSHOT_REFRESH_INTERVAL:
+            # 다른 워커가 이미 갱신했을 수 있으므로 Redis 사본을 먼저 확인
+            shared = await self._load_shared()
+            if shared and (snap is None or shared.built_at > snap.built_at):
+                self._set_local(shared)
+                snap = shared
+
+        if snap is None or snap.age > SNAPSHOT_MAX_STALE:
+            snap = await self.refresh()
+        elif snap.age > SNAPSHOT_REFRESH_INTERVAL:
+            self._schedule_refresh()
+        return snap.data
+
+    # ============ 갱신 ============
+    async def refresh(self) -> PoolSnapshot:
+        async with self._refresh_lock:
+            # 락을 기다리는 동안 다른 코루틴이 갱신을 마쳤다면 그대로 사용
+            snap = self._local
+            if snap is not None and snap.age < SNAPSHOT_REFRESH_INTERVAL:
+                return snap
+
+            started = time.time()
+            response, degraded = await self.service.build_all_pools()
+            snap = PoolSnapshot(built_at=started, data=jsonable_encoder(response))
+            self._set_local(snap)
+            await self._store_shared(snap)
+            if "prices" in degraded:
+                # 가격이 빠진 조립 결과의 USD 지표를 필터/정렬 기준으로 저장하지 않는다
+                _logger.info("[snapshot] prices degraded, keeping previous pool metrics")
+            else:
+                await self._store_metrics(response)
+            _logger.info(
+                f"[snapshot] rebuilt {len(snap.data)} pools in {time.time() - started:.2f}s"
+            )
+            return snap
+
+    def _set_local(self, snap: PoolSnapshot):
+        self._local = snap
+        # 스냅샷이 바뀔 때마다 실시간 구독자에게 변경된 풀만 push
+        self.broadcaster.publish(snap.data, complete=True)
+
+    def _schedule_refresh(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_if_owner())
+
+    async def _refresh_if_owner(self):
+        """
+        여러 워커가 동시에 같은 스냅샷을 재계산하지 않도록 Redis 락을 잡은 워커만 갱신.
+        락을 못 잡은 워커는 다음 읽기에서 Redis 사본을 가져간다.
+        """
+        try:
+            acquired = await self.redis.set(
+                SNAPSHOT_LOCK_KEY, "1", nx=True, ex=max(int(SNAPSHOT_REFRESH_INTERVAL), 1)
+            )
+            if not acquired:
+                return
+            await self.refresh()
+        except Exception as e:
+            _logger.info(f"⚠️ snapshot refresh failed: {e}", exc_info=True)
+
+    # ============ Redis 사본 ============
+    async def _load_shared(self) -> Optional[PoolSnapshot]:
+        try:
+            raw = await self.redis.get(SNAPSHOT_REDIS_KEY)
+            if not raw:
+                return None
+            payload = json.loads(raw)
+            return PoolSnapshot(built_at=payload["built_at"], data=payload["data"])
+        except Exception as e:
+            _logger.info(f"⚠️ failed to load shared snapshot: {e}", exc_info=True)
+            return None
+
+    async def _store_shared(self, snap: PoolSnapshot):
+        try:
+            await self.redis.set(
+                SNAPSHOT_REDIS_KEY,
+                json.dumps({"built_at": snap.built_at, "data": snap.data}),
+                ex=int(SNAPSHOT_MAX_STALE),
+            )
+        except Exception as e:
+            _logger.info(f"⚠️ failed to store shared snapshot: {e}", exc_info=True)
+
+    async def _store_metrics(self, response):
+        # 필터/정렬 쿼리(query_pools)가 사용하는 지표를 tvl 문서에 반영
+        try:
+            await self.service.save_metrics(response)
+        except Exception as e:
+            _logger.info(f"⚠️ failed to store pool metrics: {e}", exc_info=True)
+
+    # ============ 백그라운드 루프 ============
+    async def _run(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_REFRESH_INTERVAL)
+            snap = self._local
+            if snap is not None and snap.age < SNAPSHOT_REFRESH_INTERVAL:
+                continue
+            shared = await self._load_shared()
+            if shared and shared.age < SNAPSHOT_REFRESH_INTERVAL:
+                self._set_local(shared)
+                continue
+            await self._refresh_if_owner()
+
+    def start(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+            self._schedule_refresh()
+
+    async def stop(self):
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = None
+        self._refresh_task = None
@@ -0,0 +1,3 @@
+from .registry import TokenMeta, TokenRegistry
+
+__all__ = ["TokenMeta", "TokenRegistry"]
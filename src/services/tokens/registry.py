@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+from web3 import AsyncWeb3
+from pymongo import ASCENDING, UpdateOne
+from hypurrquant.utils.singleton import singleton
+from hypurrquant.logging_config import configure_logging
+from hypurrquant.db.mongo import get_mongo
+from hypurrquant.evm import Web3Ctx
+from ..index.multicall import MulticallPlan
+import os
+import time
+
+logger = configure_logging(__name__)
+
+# symbol() 을 읽지 못해 임시 symbol 로 채운 토큰을 다시 읽기까지의 시간(초). Mongo 에는 저장하지 않는다
+TOKEN_SYMBOL_RETRY_SEC = float(os.getenv("TOKEN_SYMBOL_RETRY_SEC", "600"))
+
+
+@dataclass(frozen=True)
+class TokenMeta:
+    address: str
+    symbol: str
+    decimals: int
+
+
+@singleton
+class TokenRegistry:
+    """
+    ERC20 의 불변 필드(symbol, decimals) 저장소.
+    프로세스 내 dict -> Mongo(token_metadata) -> Multicall 순으로 읽고,
+    처음 본 토큰만 체인에서 읽어 Mongo 에 저장한다 (워밍업 이후 RPC 0회).
+    """
+
+    def __init__(self):
+        self.col = get_mongo()["token_metadata"]
+        self._cache: Dict[Tuple[int, str], TokenMeta] = {}
+        # symbol 을 못 읽은 토큰: (임시 meta, 다시 읽을 시각)
+        self._provisional: Dict[Tuple[int, str], Tuple[TokenMeta, float]] = {}
+
+    async def ensure_indexes(self):
+        await self.col.create_index(
+            [("chain_id", ASCENDING), ("address", ASCENDING)], unique=True
+        )
+
+    async def get(self, web3ctx: Web3Ctx, address: str) -> TokenMeta | None:
+        return (await self.get_many(web3ctx, [address])).get(
+            AsyncWeb3.to_checksum_address(address)
+        )
+
+    async def get_many(
+        self, web3ctx: Web3Ctx, addresses: Iterable[str]
+    ) -> Dict[str, TokenMeta]:
+        """
+        반환: checksum address -> TokenMeta. decimals 를 읽지 못한 토큰은 빠진다.
+        """
+        chain_id = web3ctx.chain_id
+        addresses = list(
+            dict.fromkeys(AsyncWeb3.to_checksum_address(a) for a in addresses)
+        )
+        results: Dict[str, TokenMeta] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        for addr in addresses:
+            meta = self._cache.get((chain_id, addr))
+            if meta is None:
+                provisional = self._provisional.get((chain_id, addr))
+                if provisional is not None and provisional[1] > now:
+                    meta = provisional[0]
+            if meta is None:
+                missing.append(addr)
+            else:
+                results[addr] = meta
+
+        if missing:
+            async for doc in self.col.find(
+                {"chain_id": chain_id, "address": {"$in": missing}},
+                projection={"_id": 0, "address": 1, "symbol": 1, "decimals": 1},
+            ):
+                meta = TokenMeta(doc["address"], doc["symbol"], int(doc["decimals"]))
+                self._cache[(chain_id, meta.address)] = meta
+                results[meta.address] = meta
+            missing = [a for a in missing if a not in results]
+
+        if missing:
+            fetched, provisional = await self._fetch(web3ctx, missing)
+            for meta in fetched:
+                self._cache[(chain_id, meta.address)] = meta
+                self._provisional.pop((chain_id, meta.address), None)
+                results[meta.address] = meta
+            retry_at = time.monotonic() + TOKEN_SYMBOL_RETRY_SEC
+            for meta in provisional:
+                self._provisional[(chain_id, meta.address)] = (meta, retry_at)
+                results[meta.address] = meta
+            if fetched:
+                await self.col.bulk_write(
+                    [
+                        UpdateOne(
+                            {"chain_id": chain_id, "address": m.address},
+                            {"$set": {"symbol": m.symbol, "decimals": m.decimals}},
+                            upsert=True,
+                        )
+                        for m in fetched
+                    ],
+                    ordered=False,
+                )
+        return results
+
+    async def _fetch(
+        self, web3ctx: Web3Ctx, addresses: List[str]
+    ) -> Tuple[List[TokenMeta], List[TokenMeta]]:
+        """
+        반환: (symbol/decimals 를 모두 읽은 토큰, symbol 을 못 읽어 주소 앞자리로 채운 토큰)
+        두 번째는 일시적 실패일 수 있어 불변 값으로 저장하지 않는다.
+        """
+        plan = MulticallPlan()
+        idx = {
+            addr: (
+                plan.add(addr, "symbol()", ["string"]),
+                plan.add(addr, "decimals()", ["uint8"]),
+            )
+            for addr in addresses
+        }
+        results = await plan.execute(web3ctx)
+
+        fetched: List[TokenMeta] = []
+        provisional: List[TokenMeta] = []
+        for addr, (symbol_i, decimals_i) in idx.items():
+            if results[decimals_i] is None:
+                logger.info(f"⚠️ [tokens] failed to read decimals for {addr}")
+                continue
+            decimals = int(results[decimals_i][0])
+            if results[symbol_i]:
+                fetched.append(TokenMeta(addr, results[symbol_i][0], decimals))
+            else:
+                logger.info(f"⚠️ [tokens] failed to read symbol for {addr}")
+                provisional.append(TokenMeta(addr, addr[:6], decimals))
+        logger.info(
+            f"[tokens] fetched metadata for {len(fetched)}/{len(addresses)} tokens "
+            f"({len(provisional)} without symbol)"
+        )
+        return fetched, provisional
@@ -0,0 +1,345 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import os
+import time
+
+from web3 import AsyncWeb3
+from web3.providers import AsyncHTTPProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from hypurrquant.logging_config import configure_logging
+
+_logger = configure_logging(__name__)
+
+# 쉼표로 구분한 HyperEVM RPC 엔드포인트. 비어 있으면 use_chain 의 기본 provider 를 그대로 사용.
+# 엔드포인트별 초당 요청 한도는 "url|rps" 형태로 지정 (생략 시 RPC_POOL_DEFAULT_RPS)
+RPC_POOL_URLS = os.getenv("RPC_POOL_URLS", "")
+RPC_POOL_DEFAULT_RPS = float(os.getenv("RPC_POOL_DEFAULT_RPS", "20"))
+RPC_POOL_TIMEOUT_SEC = float(os.getenv("RPC_POOL_TIMEOUT_SEC", "10"))
+# hedge 요청을 보내기 전 최소 대기 (p95 가 너무 짧을 때)
+RPC_POOL_HEDGE_MIN_SEC = float(os.getenv("RPC_POOL_HEDGE_MIN_SEC", "0.2"))
+# 연속 실패 시 엔드포인트를 쉬게 하는 시간(초)
+RPC_POOL_COOLDOWN_SEC = float(os.getenv("RPC_POOL_COOLDOWN_SEC", "10"))
+
+# 상태를 바꾸는 요청은 중복 전송하면 안 되므로 hedge 하지 않는다
+NON_IDEMPOTENT_METHODS = frozenset(
+    {"eth_sendRawTransaction", "eth_sendTransaction", "eth_sign", "personal_sign"}
+)
+# eth_getLogs 는 구간 크기에 따라 지연 편차가 크고 가장 비싼 요청이라 hedge 하지 않는다
+# (LogRangeFetcher 가 자체 timeout 과 구간 분할로 처리)
+NON_HEDGED_METHODS = NON_IDEMPOTENT_METHODS | {"eth_getLogs"}
+# JSON-RPC error 응답 중 엔드포인트 문제로 보고 다른 엔드포인트로 넘길 것들
+_RETRYABLE_ERROR_HINTS = ("rate limit", "too many requests", "429", "timeout", "busy")
+LATENCY_WINDOW = 200
+EWMA_ALPHA = 0.2
+
+
+class Endpoint:
+    """
+    엔드포인트 하나의 provider + 관측치(EWMA 지연, 오류율, 최근 지연 p95) + token bucket.
+    """
+
+    def __init__(self, url: str, rps: float, timeout: float):
+        self.url = url
+        self.provider = AsyncHTTPProvider(url, request_kwargs={"timeout": timeout})
+        self.rps = rps
+        self._tokens = rps
+        self._refilled_at = time.monotonic()
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # hedge 기준은 method 별 p95 (multicall eth_call 과 eth_blockNumber 의 지연이 크게 달라서)
+        self.method_latencies: Dict[str, Deque[float]] = {}
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+
+    # ============ rate limit ============
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.rps, self._tokens + (now - self._refilled_at) * self.rps)
+        self._refilled_at = now
+
+    def wait_time(self) -> float:
+        """
+        지금 예약하면 기다려야 하는 시간(초).
+        """
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rps
+
+    def reserve(self) -> float:
+        """
+        토큰 하나를 즉시 예약하고(음수 잔고 허용) 전송 전 기다릴 시간을 반환.
+        동기적으로 예약해야 같은 틱에 몰린 요청들이 서로의 예약을 보고 다른 엔드포인트로 분산된다.
+        """
+        self._refill()
+        self._tokens -= 1
+        self.inflight += 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rps
+
+    # ============ 관측치 ============
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self) -> float:
+        # 지연이 짧고 오류가 적을수록 낮은 점수 (관측 전 엔드포인트는 우선 시도)
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.0
+        return (latency + self.inflight * 0.01) * (1 + 10 * self.error_rate)
+
+    def p95(self, method: Optional[str] = None) -> Optional[float]:
+        """
+        method 를 주면 해당 method 의 최근 지연 p95, 아니면 전체 p95. 표본이 20개 미만이면 None.
+        """
+        latencies = (
+            self.latencies if method is None else self.method_latencies.get(method, ())
+        )
+        if len(latencies) < 20:
+            return None
+        ordered = sorted(latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def record_success(self, latency: float, method: Optional[str] = None):
+        self.requests += 1
+        self.latencies.append(latency)
+        if method is not None:
+            window = self.method_latencies.get(method)
+            if window is None:
+                window = self.method_latencies[method] = deque(maxlen=LATENCY_WINDOW)
+            window.append(latency)
+        self.latency_ewma = (
+            latency
+            if self.latency_ewma is None
+            else (1 - EWMA_ALPHA) * self.latency_ewma + EWMA_ALPHA * latency
+        )
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.consecutive_errors = 0
+
+    def record_error(self, cooldown: float):
+        self.requests += 1
+        self.errors += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= 3:
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ewma": round(self.latency_ewma or 0.0, 4),
+            "p95": round(self.p95() or 0.0, 4),
+            "error_rate": round(self.error_rate, 4),
+            "cooling_down": not self.available(time.monotonic()),
+        }
+
+
+class RetryableRPCError(Exception):
+    pass
+
+
+def _is_retryable_response(response: RPCResponse) -> bool:
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error:
+        return False
+    message = str(error.get("message", "") if isinstance(error, dict) else error).lower()
+    return any(hint in message for hint in _RETRYABLE_ERROR_HINTS)
+
+
+class PooledRPCProvider(AsyncJSONBaseProvider):
+    """
+    여러 RPC 엔드포인트를 하나의 provider 처럼 쓰는 pool.
+    - 라우팅: 쿨다운 중이 아닌 엔드포인트 중 (EWMA 지연 × 오류율 가중) 점수가 가장 낮은 곳
+    - hedge : 응답이 해당 엔드포인트의 같은 method p95 를 넘기면 다음 엔드포인트로 같은 요청을 한 번 더 보내고
+              먼저 온 응답 사용. method 표본이 쌓이기 전과 eth_getLogs/상태 변경 요청은 hedge 하지 않는다
+    - failover: 연결 오류/timeout/rate limit 응답이면 다음 엔드포인트로 재시도
+    - 엔드포인트별 초당 요청 한도(token bucket) 준수
+    eth_call(multicall), eth_getLogs, 단건 조회 모두 make_request 를 거치므로 호출측 변경이 없다.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Tuple[str, float]],
+        timeout: float = RPC_POOL_TIMEOUT_SEC,
+        hedge_min: float = RPC_POOL_HEDGE_MIN_SEC,
+        cooldown: float = RPC_POOL_COOLDOWN_SEC,
+    ):
+        super().__init__()
+        if not endpoints:
+            raise ValueError("PooledRPCProvider needs at least one endpoint")
+        self.endpoints = [Endpoint(url, rps, timeout) for url, rps in endpoints]
+        self.timeout = timeout
+        self.hedge_min = hedge_min
+        self.cooldown = cooldown
+        self.hedged = 0
+
+    def __str__(self) -> str:
+        return f"PooledRPCProvider({[e.url for e in self.endpoints]})"
+
+    def _ranked(self, exclude: Sequence[Endpoint] = ()) -> List[Endpoint]:
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e not in exclude]
+        ready = [e for e in candidates if e.available(now)]
+        # 모두 쿨다운 중이면 그래도 시도는 한다
+        pool = ready or candidates
+        # rate limit 토큰이 바로 있는 엔드포인트를 먼저, 그 안에서 점수 순
+        return sorted(pool, key=lambda e: (e.wait_time() > 0, e.score()))
+
+    def _dispatch(self, endpoint: Endpoint, method: RPCEndpoint, params: Any):
+        # 예약(토큰, inflight)은 코루틴이 실행되기 전에 여기서 동기적으로 끝낸다
+        return self._send(endpoint, method, params, endpoint.reserve())
+
+    async def _send(
+        self, endpoint: Endpoint, method: RPCEndpoint, params: Any, delay: float
+    ):
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = time.monotonic()
+            response = await asyncio.wait_for(
+                endpoint.provider.make_request(method, params), timeout=self.timeout
+            )
+            if _is_retryable_response(response):
+                raise RetryableRPCError(str(response.get("error")))
+            endpoint.record_success(time.monotonic() - started, method)
+            return response
+        except asyncio.CancelledError:
+            # hedge 경쟁에서 진 요청은 오류로 세지 않는다
+            raise
+        except Exception:
+            endpoint.record_error(self.cooldown)
+            raise
+        finally:
+            endpoint.inflight -= 1
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        tried: List[Endpoint] = []
+        last_error: Optional[BaseException] = None
+        while len(tried) < len(self.endpoints):
+            ranked = self._ranked(exclude=tried)
+            primary = ranked[0]
+            tried.append(primary)
+            backup = ranked[1] if len(ranked) > 1 else None
+            try:
+                if backup is None or method in NON_HEDGED_METHODS:
+                    return await self._dispatch(primary, method, params)
+                return await self._hedged(primary, backup, method, params, tried)
+            except Exception as e:
+                last_error = e
+                _logger.debug(f"[rpc-pool] {method} failed on {primary.url}: {e!r}")
+        raise last_error  # type: ignore[misc]
+
+    async def _hedged(
+        self,
+        primary: Endpoint,
+        backup: Endpoint,
+        method: RPCEndpoint,
+        params: Any,
+        tried: List[Endpoint],
+    ) -> RPCResponse:
+        first = asyncio.create_task(self._dispatch(primary, method, params))
+        p95 = primary.p95(method)
+        if p95 is None:
+            # 이 method 의 지연 분포를 아직 모르면 중복 요청을 보내지 않는다
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=max(p95, self.hedge_min))
+        if done:
+            return first.result()
+
+        # p95 를 넘긴 요청: 다음 엔드포인트로 중복 요청을 보내고 먼저 성공한 응답 사용
+        self.hedged += 1
+        tried.append(backup)
+        second = asyncio.create_task(self._dispatch(backup, method, params))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def make_batch_request(self, requests: List[Tuple[RPCEndpoint, Any]]):
+        # batch 는 hedge 없이 가장 좋은 엔드포인트로, 실패 시 다음 엔드포인트로
+        last_error: Optional[BaseException] = None
+        for endpoint in self._ranked():
+            delay = endpoint.reserve()
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                started = time.monotonic()
+                response = await endpoint.provider.make_batch_request(requests)
+            except Exception as e:
+                endpoint.record_error(self.cooldown)
+                last_error = e
+                continue
+            finally:
+                endpoint.inflight -= 1
+            endpoint.record_success(time.monotonic() - started)
+            return response
+        raise last_error  # type: ignore[misc]
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        results = await asyncio.gather(
+            *(e.provider.is_connected() for e in self.endpoints),
+            return_exceptions=True,
+        )
+        return any(r is True for r in results)
+
+    async def disconnect(self) -> None:
+        for e in self.endpoints:
+            try:
+                await e.provider.disconnect()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hedged": self.hedged, "endpoints": [e.stats() for e in self.endpoints]}
+
+
+def parse_endpoints(raw: str, default_rps: float = RPC_POOL_DEFAULT_RPS):
+    endpoints = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, rps = item.partition("|")
+        endpoints.append((url.strip(), float(rps) if rps else default_rps))
+    return endpoints
+
+
+_pool: Optional[PooledRPCProvider] = None
+
+
+def get_rpc_pool() -> Optional[PooledRPCProvider]:
+    """
+    RPC_POOL_URLS 로 만든 프로세스 공용 pool (관측치를 모든 Web3 인스턴스가 공유). 설정이 없으면 None.
+    """
+    global _pool
+    if _pool is None:
+        endpoints = parse_endpoints(RPC_POOL_URLS)
+        if endpoints:
+            _pool = PooledRPCProvider(endpoints)
+            _logger.info(f"[rpc-pool] using {len(endpoints)} endpoints")
+    return _pool
+
+
+def use_rpc_pool(w3: AsyncWeb3) -> AsyncWeb3:
+    """
+    use_chain 이 만든 AsyncWeb3 의 provider 를 pool 로 교체 (RPC_POOL_URLS 가 있을 때만, 여러 번 호출해도 안전).
+    """
+    pool = get_rpc_pool()
+    if pool is not None and w3.provider is not pool:
+        w3.provider = pool
+    return w3
@@ -0,0 +1,84 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar
+import asyncio
+
+from .metrics import REGISTRY
+
+T = TypeVar("T")
+
+_registry: List["SingleFlight"] = []
+
+
+class SingleFlight:
+    """
+    동일한 key 로 동시에 들어온 호출을 하나의 실행으로 합친다 (Go singleflight 와 동일한 개념).
+    - 첫 호출(leader)만 실제 코루틴을 실행하고, 나머지는 같은 결과를 기다린다.
+    - 실행은 별도 task 로 돌기 때문에 호출자 하나가 취소되어도 다른 호출자에게 영향이 없다.
+    - 완료되면 key 는 즉시 제거된다 (결과 캐시가 아님).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0  # 실제로 실행된 횟수
+        self.coalesced = 0  # 진행 중인 실행에 합류한 호출 수
+        _registry.append(self)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.executed += 1
+
+        def _done(t: asyncio.Task, key=key):
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            # 모든 호출자가 취소된 경우 "exception was never retrieved" 경고 방지
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight,
+        }
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    return {sf.name: sf.stats() for sf in _registry}
+
+
+# ==========================
+# /metrics 노출
+# ==========================
+
+_executed_counter = REGISTRY.counter(
+    "singleflight_executed_total", "Calls that actually ran", ["name"]
+)
+_coalesced_counter = REGISTRY.counter(
+    "singleflight_coalesced_total", "Calls that joined an in-flight call", ["name"]
+)
+_inflight_gauge = REGISTRY.gauge(
+    "singleflight_inflight", "Keys currently in flight", ["name"]
+)
+
+
+def _collect():
+    for sf in _registry:
+        _executed_counter.set(sf.name, value=sf.executed)
+        _coalesced_counter.set(sf.name, value=sf.coalesced)
+        _inflight_gauge.set(sf.name, value=sf.inflight)
+
+
+REGISTRY.add_collector(_collect)
@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+
+from hypurrquant.logging_config import configure_logging
+
+_logger = configure_logging(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    fn       : 의존 stage 결과를 kwargs 로 받아 awaitable 을 반환
+    deps     : 먼저 끝나야 하는 stage 이름들
+    deadline : 초 단위 제한. 넘기면 fallback 결과를 사용 (fallback 이 없으면 예외)
+    fallback : fn 과 같은 kwargs 로 호출되어 대체 결과를 반환 (timeout/예외 시)
+    """
+
+    fn: Callable[..., Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    deadline: Optional[float] = None
+    fallback: Optional[Callable[..., Any]] = None
+
+
+async def run_stages(stages: Dict[str, Stage]) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    stage 들을 의존 관계만 지키면서 최대한 동시에 실행한다 (순환 의존은 지원하지 않음).
+    반환: (stage 별 결과, fallback 으로 대체된 stage 이름)
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+    degraded: Set[str] = set()
+
+    async def run(name: str) -> Any:
+        stage = stages[name]
+        kwargs = {dep: await tasks[dep] for dep in stage.deps}
+        try:
+            if stage.deadline is None:
+                return await stage.fn(**kwargs)
+            return await asyncio.wait_for(stage.fn(**kwargs), timeout=stage.deadline)
+        except Exception as e:
+            if stage.fallback is None:
+                raise
+            _logger.info(f"⚠️ stage '{name}' degraded to fallback: {e!r}")
+            degraded.add(name)
+            return stage.fallback(**kwargs)
+
+    for name, stage in stages.items():
+        unknown = [d for d in stage.deps if d not in stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {unknown}")
+    # task 는 모두 만든 뒤에 실행되므로 선언 순서와 무관하게 의존 stage 를 기다릴 수 있다
+    for name in stages:
+        tasks[name] = asyncio.create_task(run(name))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return {name: task.result() for name, task in tasks.items()}, degraded